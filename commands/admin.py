@@ -5,7 +5,9 @@ import discord
 from discord import Embed, ApplicationContext
 
 from game.logic.tick import tick
+from game.logic.batch import compare
 from scripts.ui import ConfirmView
+from scripts.rendering import snapshot_cache
 from game.data.constants import brand_color
 from world.world import get_state
 
@@ -24,8 +26,10 @@ class AdminCog(discord.Cog):
         await ctx.interaction.response.send_message(embed=Embed(
             color=brand_color,
             title="Are you sure?",
-            description=("Forcing a tick at the wrong"
-                         "time may invalidate nation data.")
+            description=("Forcing a tick at the wrong "
+                         "time may invalidate nation data. It counts as "
+                         "today's tick, so the daily tick won't run again "
+                         "until tomorrow.")
         ), view=ConfirmView(confirm_future))
         message = await ctx.interaction.original_response()
         
@@ -55,6 +59,33 @@ class AdminCog(discord.Cog):
             logger.error(f"Couldn't execute game tick: {e}")
             raise
 
+    @discord.slash_command(description="Show how often map snapshots are reused.")
+    async def renderstats(self, ctx: ApplicationContext):
+        lookups = snapshot_cache.hits + snapshot_cache.misses
+        hit_rate = snapshot_cache.hits / lookups if lookups else 0
+        await ctx.interaction.response.send_message(embed=Embed(
+            color=brand_color,
+            title="Snapshot cache",
+            description=(f"Hits: {snapshot_cache.hits}\n"
+                         f"Misses: {snapshot_cache.misses}\n"
+                         f"Hit rate: {hit_rate:.1%}\n"
+                         f"Cached: {len(snapshot_cache)}/{snapshot_cache.size}")
+        ), ephemeral=True)
+
+    @discord.slash_command(description="Check the batched economy against the market by market one.")
+    async def econcheck(self, ctx: ApplicationContext):
+        await ctx.interaction.response.defer(ephemeral=True)
+        mismatches = compare(get_state())
+        if mismatches:
+            logger.warning("Batched economy mismatches:\n" + "\n".join(mismatches))
+        await ctx.followup.send(embed=Embed(
+            color=brand_color,
+            title="Economy check",
+            description=("Both solvers agree." if not mismatches else
+                         f"{len(mismatches)} supplies differ:\n" 
+                         + "\n".join(mismatches[:20]))
+        ), ephemeral=True)
+
 def setup(bot: discord.Bot):
     try:
         logger.info("Registering admin cog")
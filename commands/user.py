@@ -1,4 +1,3 @@
-import os
 import logging
 import asyncio
 import discord
@@ -7,12 +6,17 @@ from discord import ApplicationContext, Embed
 from PIL import ImageColor
 
 from scripts.response import interaction_response, followup_response, interacton_error, followup_error
-from scripts.errors import NationsException, CancelledException
+from scripts.errors import (NationsException, CancelledException, 
+                            DoesNotExist, NoPath, NationIDNotFound)
 import scripts.rendering as rendering
 from scripts.ui import ConfirmView
 
-from game.data.constants import brand_color
+from game.data.constants import (brand_color, map_zoom_levels, 
+                                 forecast_max_ticks)
 from game.logic.actions import new_nation, new_region, new_army, new_fleet
+from game.logic.combat import move_along_path
+from game.logic.pathfinding import find_path
+import game.logic.forecast as forecasting
 
 from world.world import get_state
 
@@ -52,26 +56,24 @@ class UserCog(discord.Cog):
             await ctx.interaction.response.defer()
             followup_msg: discord.WebhookMessage = None
 
-            virtual_snapshot = rendering.snapshot_center(capital_x, capital_y, get_state(), {(capital_x, capital_y): "metropolis"})
-            map_filepath = "data/snapshot" + str(ctx.interaction.user.id) + ".png"
-            virtual_snapshot.save(map_filepath)
-            with open(map_filepath, "rb") as f:
-                snapshot_file = discord.File(map_filepath, filename="snapshot.png")
-                
-                confirm_future = asyncio.Future()
-                confirm_view = ConfirmView(confirm_future)
-                followup_msg = await ctx.followup.send(
-                    embed=Embed(
-                        color=brand_color,
-                        title="Confirm placement",
-                        description="Your capital will go here. Are you sure?"
-                    ).set_image(
-                        url="attachment://snapshot.png"
-                    ),
-                    file=snapshot_file,
-                    view=confirm_view,
-                    wait=True
-                )
+            view = rendering.center_view(capital_x, capital_y, get_state(), {(capital_x, capital_y): "metropolis"})
+            snapshot_file = discord.File(await rendering.encode_snapshot(view), 
+                                         filename=rendering.snapshot_filename)
+            
+            confirm_future = asyncio.Future()
+            confirm_view = ConfirmView(confirm_future)
+            followup_msg = await ctx.followup.send(
+                embed=Embed(
+                    color=brand_color,
+                    title="Confirm placement",
+                    description="Your capital will go here. Are you sure?"
+                ).set_image(
+                    url="attachment://" + rendering.snapshot_filename
+                ),
+                file=snapshot_file,
+                view=confirm_view,
+                wait=True
+            )
             await asyncio.wait([confirm_future])
             confirmation = confirm_future.result()
             if confirmation in ["No", None]:
@@ -125,14 +127,13 @@ class UserCog(discord.Cog):
     @discord.slash_command(description="Get a map of a location's surroundings!")
     @discord.option("location_x", input_type=int, description="The x-coordinate (1st on the map) of the hex to show.")
     @discord.option("location_y", input_type=int, description="The y-coordinate (2nd on the map) of the hex to show.")
-    async def map(self, ctx: ApplicationContext, location_x: int, location_y: int):
+    @discord.option("zoom", input_type=int, description=f"How far to zoom out, from 0 for the closest view to {map_zoom_levels - 1} for the widest.", default=0, min_value=0, max_value=map_zoom_levels - 1)
+    async def map(self, ctx: ApplicationContext, location_x: int, location_y: int, zoom: int):
         try:
-            map_image = rendering.snapshot_center(location_x, location_y, get_state())
-            map_filepath = "data/snapshot" + str(ctx.interaction.user.id) + ".png"
-            map_image.save(map_filepath)
-
-            await ctx.interaction.response.send_message(file=discord.File(map_filepath), ephemeral=True)
-            os.remove(map_filepath)
+            view = rendering.center_view(location_x, location_y, get_state(), zoom=zoom)
+            snapshot_file = discord.File(await rendering.encode_snapshot(view), 
+                                         filename=rendering.snapshot_filename)
+            await ctx.interaction.response.send_message(file=snapshot_file, ephemeral=True)
         except NationsException as e:
             await interacton_error(ctx.interaction, e.user_message)
             raise
@@ -141,6 +142,49 @@ class UserCog(discord.Cog):
             await interacton_error(ctx.interaction)
             raise
 
+    @discord.slash_command(description="Predicts how your nation will grow over the next few ticks.")
+    @discord.option("ticks", input_type=int, description="How many ticks ahead to look.", default=4, min_value=1, max_value=forecast_max_ticks)
+    async def forecast(self, ctx: ApplicationContext, ticks: int):
+        await ctx.interaction.response.defer(ephemeral=True)
+        try:
+            state = get_state()
+            nation = state.nations.get(ctx.interaction.user.id)
+            if nation is None:
+                raise NationIDNotFound(ctx.interaction.user.id)
+
+            # The nation can change while the forecast runs, so only report
+            # on what it had when it started
+            regions = [state.regions[region_id] for region_id in nation.regions]
+            markets = [state.markets[market_id] for market_id in nation.markets]
+            result = await forecasting.forecast(state, ticks)
+            lines = []
+            for region in regions:
+                populations = result.populations[region.id]
+                tiers = result.tiers[region.id]
+                lines.append(f"**{region.name}**: population {populations[0]:.2f} → {populations[-1]:.2f}, tier {tiers[0]} → {tiers[-1]}")
+
+            for market in markets:
+                # The lowest fulfillment of each resource, and when it happens
+                worst: dict[str, tuple[float, int]] = {}
+                for tick, shortages in enumerate(result.shortages[market.id], start=1):
+                    for item, fulfillment in shortages.items():
+                        if item not in worst or fulfillment < worst[item][0]:
+                            worst[item] = (fulfillment, tick)
+                if worst:
+                    lines.append(f"**{market.name} market** will run short of " + ", ".join(
+                        f"{item} ({fulfillment:.0%} met in tick {tick})" 
+                        for item, (fulfillment, tick) in sorted(worst.items())
+                    ))
+
+            await followup_response(ctx.followup, f"Forecast for the next {ticks} ticks", "\n".join(lines) or "Your nation has no regions yet.", ephemeral=True)
+        except NationsException as e:
+            await followup_error(ctx.followup, e.user_message)
+            raise
+        except Exception as e:
+            logger.error(f"Failed to forecast for {ctx.interaction.user.name}: {e}")
+            await followup_error(ctx.followup)
+            raise
+
     # ----- MILITARY COMMANDS ----- #
 
     military = discord.SlashCommandGroup("military", description="Manage your military")
@@ -179,6 +223,53 @@ class UserCog(discord.Cog):
         
         await interaction_response(ctx.interaction, "Created!", f"New fleet {name} started training in {city}")
 
+    @military.command(name="range", description="Shows where a unit can move this season")
+    @discord.option("unit", input_type=str, description="The name of the unit.")
+    async def unit_range(self, ctx: ApplicationContext, unit: str):
+        try:
+            state = get_state()
+            unit_id = state.unit_ids.get(unit)
+            if unit_id is None or state.units[unit_id].owner != ctx.interaction.user.id:
+                raise DoesNotExist("unit", "Range map", unit)
+
+            view = rendering.reach_view([state.units[unit_id]], state)
+            snapshot_file = discord.File(await rendering.encode_snapshot(view), 
+                                         filename=rendering.snapshot_filename)
+            await ctx.interaction.response.send_message(file=snapshot_file, ephemeral=True)
+        except NationsException as e:
+            await interacton_error(ctx.interaction, e.user_message)
+            raise
+        except Exception as e:
+            logger.error(f"Failed to render range of {unit} for {ctx.interaction.user.name}: {e}")
+            await interacton_error(ctx.interaction)
+            raise
+
+    @military.command(description="Moves a unit to a location by the cheapest route")
+    @discord.option("unit", input_type=str, description="The name of the unit to move.")
+    @discord.option("x", input_type=int, description="The x-coordinate (1st on the map) to move to.")
+    @discord.option("y", input_type=int, description="The y-coordinate (2nd on the map) to move to.")
+    async def march(self, ctx: ApplicationContext, unit: str, x: int, y: int):
+        try:
+            state = get_state()
+            unit_id = state.unit_ids.get(unit)
+            if unit_id is None or state.units[unit_id].owner != ctx.interaction.user.id:
+                raise DoesNotExist("unit", "March", unit)
+            marching_unit = state.units[unit_id]
+
+            path = find_path(marching_unit, (x, y), state)
+            if path is None:
+                raise NoPath((x, y))
+            await move_along_path(marching_unit, path, state)
+        except NationsException as e:
+            await interacton_error(ctx.interaction, e.user_message)
+            raise
+        except Exception as e:
+            logger.error(f"Failed to march {unit} to {(x, y)} for {ctx.interaction.user.name}: {e}")
+            await interacton_error(ctx.interaction)
+            raise
+        
+        await interaction_response(ctx.interaction, "Marched!", f"{unit} is now at {marching_unit.location}")
+
     # ----- BUILD COMMANDS ----- #
 
     build = discord.SlashCommandGroup("build", description="Build structures")
@@ -193,27 +284,24 @@ class UserCog(discord.Cog):
         followup_msg: discord.WebhookMessage = None
         
         try:
-            virtual_snapshot = rendering.snapshot_center(x, y, get_state(), {(x, y): "metropolis"})
-            map_filepath = "data/snapshot" + str(ctx.interaction.user.id) + ".png"
-            virtual_snapshot.save(map_filepath)
-
-            with open(map_filepath, "rb") as f:
-                snapshot_file = discord.File(map_filepath, filename="snapshot.png")
-                
-                confirm_future = asyncio.Future()
-                confirm_view = ConfirmView(confirm_future)
-                followup_msg = await ctx.followup.send(
-                    embed=Embed(
-                        color=brand_color,
-                        title="Confirm placement",
-                        description="Your new city will go here. Are you sure?"
-                    ).set_image(
-                        url="attachment://snapshot.png"
-                    ),
-                    file=snapshot_file,
-                    view=confirm_view,
-                    wait=True
-                )
+            view = rendering.center_view(x, y, get_state(), {(x, y): "metropolis"})
+            snapshot_file = discord.File(await rendering.encode_snapshot(view), 
+                                         filename=rendering.snapshot_filename)
+            
+            confirm_future = asyncio.Future()
+            confirm_view = ConfirmView(confirm_future)
+            followup_msg = await ctx.followup.send(
+                embed=Embed(
+                    color=brand_color,
+                    title="Confirm placement",
+                    description="Your new city will go here. Are you sure?"
+                ).set_image(
+                    url="attachment://" + rendering.snapshot_filename
+                ),
+                file=snapshot_file,
+                view=confirm_view,
+                wait=True
+            )
             await asyncio.wait([confirm_future])
             confirmation = confirm_future.result()
             if confirmation in ["No", None]:
@@ -261,7 +349,7 @@ class UserCog(discord.Cog):
     @discord.option("hex", input_type=str, description="The hex value of the new color")
     async def color(self, ctx: ApplicationContext, hex: str):
         try:
-            get_state().nations[ctx.interaction.user.id].color = discord.Colour.from_rgb(ImageColor.getrgb(hex))
+            get_state().nations[ctx.interaction.user.id].color = discord.Colour.from_rgb(*ImageColor.getrgb(hex)[:3])
             await get_state().nations[ctx.interaction.user.id].save()
             logger.info(f"{ctx.interaction.user.name} changed their nation color to '{hex}'")
             await interaction_response(ctx.interaction, f"Color changed!", f"Your nation color has been changed to '{hex}'")
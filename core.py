@@ -1,10 +1,8 @@
-import asyncio
 import dotenv
 import os
 import tracemalloc
 import logging
 
-from world.database import get_db
 from scripts.log import log_setup
 log_setup()
 
@@ -35,5 +33,4 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         pass
     finally:
-        logger.critical("Shutting down.")
-        asyncio.run(get_db().commit())
\ No newline at end of file
+        logger.critical("Shutting down.")
\ No newline at end of file
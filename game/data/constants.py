@@ -1,12 +1,13 @@
 from discord import Color
 from dataclasses import dataclass
 
-# 0: spring, 1: summer, 2: autumn, 3: winter
+# 0: spring, 1: summer, 2: autumn, 3: winter. Kept in step with the saved
+# game clock, see game.objs.clock
 current_season = 0
 
-def update_season():
+def set_season(season: int):
     global current_season
-    current_season = (current_season + 1) % 4
+    current_season = season
 
 brand_color = Color(16417064)
 
@@ -117,6 +118,48 @@ textile_food_debuff = 0.4 # % of food produced with a textile industry
 industry_machinery_buff = 0.5
 industry_steel_buff = 0.8
 
+# The economy solver stops once no fulfillment changes by more than this
+economy_tolerance = 1e-6
+economy_max_iterations = 50
+# Solve every market at once during ticks, see game.logic.batch
+batched_economy = False
+# Solve the batched economy in a worker thread during ticks, so the event
+# loop isn't blocked. Needs batched_economy. Nations are still ticked on the
+# loop, since a worker process pool for them cost more than it saved. See 
+# game.logic.offload
+offload_economy = False
+
+# The most ticks /forecast will simulate, and how many forecasts are kept.
+# See game.logic.forecast
+forecast_max_ticks = 8
+forecast_cache_size = 16
+
+# Threads that render map snapshots, see scripts.rendering
+render_workers = 2
+# The PIL format and save options snapshots are encoded with. PNG at a low
+# compress level is the fastest to encode; "webp" or "jpeg" with a 
+# "quality" option give smaller uploads.
+snapshot_format = "png"
+snapshot_options = {"compress_level": 1}
+# Political map chunks kept drawn at once, at 1 MB each
+political_chunk_limit = 64
+# Encoded snapshots kept for reuse, usually around 10 KB each
+snapshot_cache_size = 256
+# Changes are committed in the background this many seconds after they're
+# made, or as soon as this many objects are waiting. See world.database
+write_latency = 2.0
+write_batch_size = 200
+
+# Read-only database connections kept open for loads, next to the one writer.
+# See world.database.reading
+read_pool_size = 2
+
+# Zoom levels in the map tile pyramid, each half the size of the last. See
+# scripts.pyramid
+map_zoom_levels = 5
+# Decoded pyramid tiles kept in memory, at 1 MB each
+pyramid_cache_size = 64
+
 ### Relative to the weights of each luxury. With no bonuses, all
 ### luxuries add up to a weight of 5.
 no_luxury_weight = 20
@@ -127,6 +170,16 @@ luxury_industries = ["jewelry", "spice", "consumer_goods",
 
 city_types = ["outpost", "village", "town", "city", "metropolis"]
 
+# Tiles store their biome as an index into this list, so new biomes must only
+# ever be appended to the end
+biomes = ["water", "rainforest", "monsoon", "savanna", "hot_steppe",
+          "hot_desert", "mountains", "high_mountains", "oceanic",
+          "humid_subtropical", "mediterranean", "humid_continental",
+          "subarctic_continental", "cold_steppe", "cold_desert", "tundra",
+          "ice_caps"]
+# Also the order of the ore columns in the tiles table
+ore_types = ["iron", "copper", "gold", "coal", "oil"]
+
 backup_msg = """There was a problem processing that request! Ping @madaman and 
                 she will take care of it as soon as possible."""
 
@@ -1,5 +1,5 @@
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +46,24 @@ class IndustryType:
     If it returns False, the industry will fail to be built. If left blank,
     will always return True.
     """
+    output: str | None = None
+    """
+    The name of the resource this industry produces. Must match the resource
+    returned by :attr:`production`.
+    """
+    inputs: list[str] = field(default_factory=list)
+    """
+    The resources whose fulfillment this industry's production depends on,
+    other than the machinery and steel bonuses that every industry gets. Used
+    to order the economy solver, see :mod:`game.logic.equilibrium`.
+    """
+    base: Callable[["Region", "GameState"], float] | None = None
+    """
+    Returns this industry's output in a region before its inputs and bonuses
+    are applied. Production is always this times the lowest fulfillment of
+    :attr:`inputs` (if any) and the machinery and steel bonuses, which lets 
+    :mod:`game.logic.batch` work out every market's production at once.
+    """
 
 def machinery_bonus(region: "Region", state: "GameState", production: float):
     machinery_fulfillment = get_fulfillment(region.market, "machinery", state)
@@ -57,6 +75,15 @@ def steel_bonus(region: "Region", state: "GameState", production: float):
     bonus = production * steel_fulfillment * industry_steel_buff
     return max(0, bonus)
 
+def subsistence_base(region: "Region", state: "GameState") -> float:
+    """
+    Returns the subsistence food output of a region before bonuses.
+    """
+    production = region_arability(region, state) / math.sqrt(region.population)
+    if "textile" in region.industries:
+        production *= textile_food_debuff
+    return production
+
 def subsistence_production(
         region: "Region", 
         state: "GameState"
@@ -65,23 +92,43 @@ def subsistence_production(
     Returns food equal to the sum of the arabilities of the region's tiles,
     see :class:`world.map.Tile.arability`. 
     """
-    production = region_arability(region, state) / math.sqrt(region.population)
-    if "textile" in region.industries:
-        production *= textile_food_debuff
+    production = subsistence_base(region, state)
     
     production += machinery_bonus(region, state, production)
     production += steel_bonus(region, state, production)
 
     return ("food", production)
 
+def farming_base(region: "Region", state: "GameState") -> float:
+    return region_arability(region, state) * subsistence_base(region, state)
+
 def farming_production(
         region: "Region", 
         state: "GameState"
     ) -> tuple[str, float]:
-    subsistence = subsistence_production(region)
+    subsistence = subsistence_production(region, state)[1]
     production = region_arability(region, state) * subsistence
     return ("food", production)
 
+def mines_base(ore: str) -> Callable[["Region", "GameState"], float]:
+    """
+    Creates a function returning the output of a mine of the passed ore
+    before bonuses, the sum of the richness values of the region's tiles 
+    times its population.
+    """
+    def mine_base(region: "Region", state: "GameState") -> float:
+        base_production = 0
+        for location in region.tiles:
+            tile = state.tiles[location]
+            if tile.terrain.biome == "water":
+                # Oceans & lakes do not have ores
+                continue
+            base_production += tile.terrain.ores[ore]
+        
+        return base_production * region.population
+    
+    return mine_base
+
 def mines_production(
         ore: str
     ) -> Callable[[str], tuple[str, float]]:
@@ -90,19 +137,12 @@ def mines_production(
     passed ore. Output is based on the sum of the richness values of the 
     region's tiles, see :class:`world.map.Terrain.ores`.
     """
+    base = mines_base(ore)
     def mine_production(
             region: "Region", 
             state: "GameState"
         ) -> tuple[str, float]:
-        base_production = 0
-        for location in region.tiles:
-            tile = state.tiles[location]
-            if tile.terrain.biome == "water":
-                # Oceans & lakes do not have ores
-                continue
-            base_production += tile.terrain.ores[ore]
-        
-        production = base_production * region.population
+        production = base(region, state)
 
         production += machinery_bonus(region, state, production)
         production += steel_bonus(region, state, production)
@@ -111,6 +151,9 @@ def mines_production(
 
     return mine_production
 
+def steel_base(region: "Region", state: "GameState") -> float:
+    return region.population * steel_mult
+
 def steel_production(
         region: "Region",
         state: "GameState"
@@ -118,12 +161,15 @@ def steel_production(
     iron_fill = get_fulfillment(region.market, "iron", state)
     coal_fill = get_fulfillment(region.market, "coal", state)
     limiter = min(iron_fill, coal_fill)
-    production = limiter * region.population * steel_mult
+    production = limiter * steel_base(region, state)
 
     production += machinery_bonus(region, state, production)
     production += steel_bonus(region, state, production)
 
     return ("steel", production)
+
+def machinery_base(region: "Region", state: "GameState") -> float:
+    return region.population * machine_mult
     
 def machinery_production(
         region: "Region",
@@ -132,13 +178,16 @@ def machinery_production(
     iron_fill = get_fulfillment(region.market, "iron", state)
     copper_fill = get_fulfillment(region.market, "copper", state)
     limiter = min(iron_fill, copper_fill)
-    production = limiter * region.population * machine_mult
+    production = limiter * machinery_base(region, state)
 
     production += machinery_bonus(region, state, production)
     production += steel_bonus(region, state, production)
 
     return ("machinery", production)
 
+def luxuries_base(region: "Region", state: "GameState") -> float:
+    return region.population * luxury_mult
+
 def luxuries_production(luxury: str) -> Callable[[str], tuple[str, float]]:
     """
     Creates a luxury production function for this industry based on the passed
@@ -148,7 +197,7 @@ def luxuries_production(luxury: str) -> Callable[[str], tuple[str, float]]:
             region: "Region", 
             state: "GameState"
         ) -> tuple[str, float]:
-        production = region.population * luxury_mult
+        production = luxuries_base(region, state)
         
         production += machinery_bonus(region, state, production)
         production += steel_bonus(region, state, production)
@@ -167,82 +216,116 @@ industry_types = {
     "subsistence": IndustryType(
         cost=0,
         production=subsistence_production,
-        name="subsistence"
+        name="subsistence",
+        output="food",
+        base=subsistence_base
     ),
     "farming": IndustryType(
         cost=2,
         production=farming_production,
-        name="farming"
+        name="farming",
+        output="food",
+        base=farming_base
     ),
     "iron_mining": IndustryType(
         cost=3,
         production=mines_production("iron"),
-        name="iron_mining"
+        name="iron_mining",
+        output="iron",
+        base=mines_base("iron")
     ),
     "copper_mining": IndustryType(
         cost=3,
         production=mines_production("copper"),
-        name="copper_mining"
+        name="copper_mining",
+        output="copper",
+        base=mines_base("copper")
     ),
     "gold_mining": IndustryType(
         cost=3,
         production=mines_production("gold"),
-        name="gold_mining"
+        name="gold_mining",
+        output="gold",
+        base=mines_base("gold")
     ),
     "coal_mining": IndustryType(
         cost=3,
         production=mines_production("coal"),
-        name="coal_mining"
+        name="coal_mining",
+        output="coal",
+        base=mines_base("coal")
     ),
     "oil_drilling": IndustryType(
         cost=4,
         production=mines_production("oil"),
-        name="oil_drilling"
+        name="oil_drilling",
+        output="oil",
+        base=mines_base("oil")
     ),
     "steelworks": IndustryType(
         cost=4,
         production=steel_production,
-        name="steelworks"
+        name="steelworks",
+        output="steel",
+        inputs=["iron", "coal"],
+        base=steel_base
     ),
     "foundry": IndustryType(
         cost=4,
         production=machinery_production,
-        name="foundry"
+        name="foundry",
+        output="machinery",
+        inputs=["iron", "copper"],
+        base=machinery_base
     ),
     "textile": IndustryType(
         cost=3,
         production=luxuries_production("textiles"),
-        name="textiles"
+        name="textiles",
+        output="textiles",
+        base=luxuries_base
     ),
     "jewelry": IndustryType(
         cost=4,
         production=luxuries_production("jewelry"),
-        name="jewelry"
+        name="jewelry",
+        output="jewelry",
+        base=luxuries_base
     ),
     "spice": IndustryType(
         cost=4,
         production=luxuries_production("spice"),
-        name="spice"
+        name="spice",
+        output="spice",
+        base=luxuries_base
     ),
     "consumer_goods": IndustryType(
         cost=4,
         production=luxuries_production("consumer_goods"),
         name="consumer_goods",
-        check=consumer_goods_check
+        check=consumer_goods_check,
+        output="consumer_goods",
+        base=luxuries_base
     ),
     "horses": IndustryType(
         cost=4,
         production=luxuries_production("horses"),
-        name="horses"
+        name="horses",
+        output="horses",
+        base=luxuries_base
     ),
     "gems": IndustryType(
         cost=4,
         production=luxuries_production("gems"),
-        name="gems"
+        name="gems",
+        output="gems",
+        base=luxuries_base
     ),
     "glass": IndustryType(
         cost=4,
         production=luxuries_production("glass"),
-        name="glass"
+        name="glass",
+        output="glass",
+        base=luxuries_base
     )
 }
\ No newline at end of file
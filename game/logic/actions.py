@@ -4,9 +4,9 @@ from typing import TYPE_CHECKING
 logger = logging.getLogger(__name__)
 
 import scripts.errors as errors
+import world.database as db
 
 from game.data.constants import admin_mode, luxury_industries
-from game.objs.market import Market
 from game.objs.unit import Unit
 from game.objs.nation import Nation
 from game.objs.region import Region
@@ -15,7 +15,7 @@ from game.objs.structure import Structure
 from game.objs.trade import Trade
 from game.data.industries import industry_types
 
-from game.logic.logistics import region_connected
+from game.logic.logistics import rebuild_markets, refresh_markets
 from game.logic.map import hex_distance, get_area, region_structures, has_port
 from game.data.structures import StructureType, structure_types
 from game.logic.growth import roll_luxuries
@@ -73,11 +73,11 @@ async def new_army(
                     home=region_id, status="TRAINING")
 
     await new_unit.save()
-    state.units[new_unit.id] = new_unit
-    state.unit_ids[name] = new_unit.id
+    state.add_unit(new_unit)
     nation.units.append(new_unit.id)
     await nation.save()
     await econ.save()
+    await refresh_markets([new_unit.location], state)
 
     return new_unit
 
@@ -133,14 +133,27 @@ async def new_fleet(
                     home=region_id)
     
     await new_unit.save()
-    state.units[new_unit.id] = new_unit
-    state.unit_ids[name] = new_unit.id
+    state.add_unit(new_unit)
     nation.units.append(new_unit.id)
     await nation.save()
     await econ.save()
+    await refresh_markets([new_unit.location], state)
 
     return new_unit
 
+async def disband_unit(unit: Unit, state: "GameState"):
+    """
+    Removes a unit from the game and deletes it from the database. Units 
+    should only ever be deleted through this, so that 
+    :attr:`GameState.unit_locations` stays correct.
+    """
+    nation = state.nations[unit.owner]
+    if unit.id in nation.units:
+        nation.units.remove(unit.id)
+    state.remove_unit(unit)
+    await db.delete_unit(unit)
+    await refresh_markets([unit.location], state)
+
 async def new_region(
         name: str, 
         location: tuple[int, int], 
@@ -191,8 +204,8 @@ async def new_region(
 
     if not capital and not admin_mode:
         in_range = False
-        for unit in state.units.values():
-            if hex_distance(unit.location, city_tile) <= 1:
+        for tile in get_area(city_tile, state):
+            if state.units_at(tile.location):
                 in_range = True
                 break
         if not in_range:
@@ -221,22 +234,20 @@ async def new_region(
     )
     
     await new_region.save()
-    state.regions[new_region.id] = new_region
-    state.region_ids[name] = new_region.id
+    state.add_region(new_region)
     nation.regions.append(new_region.id)
 
     for claim_location in to_be_claimed:
         state.tiles[claim_location].owner = new_region.id
         await state.tiles[claim_location].save()
 
-    new_market = Market(name=name, owner=owner, regions=[new_region])
-    state.markets[name] = new_market
-    await new_industry("subsistence", name, state)
-
     city_tile.structure = Structure(structure_type=structure_types["outpost"], 
-                                    location=location, region=name, 
+                                    location=location, region=new_region.id, 
                                     owner=owner)
 
+    await rebuild_markets(nation, state)
+    await new_industry("subsistence", name, state)
+
     new_region.luxury = roll_luxuries(new_region, state)
 
     await nation.save()
@@ -310,7 +321,7 @@ async def new_structure(
     if tile.structure is not None:
         raise errors.TIleAlreadyHadStructure("Structure creation", location)
     
-    if tile not in region.tiles:
+    if tile.location not in region.tiles:
         raise errors.InvalidLocation(f"{structure_type.fname} creation", 
                                      "outide the region")
 
@@ -370,6 +381,7 @@ async def new_industry(
 
     nation.econ.influence -= industry_type.cost
     region.industries.append(industry_type)
+    state.bump_version()
     
     await region.save()
     await nation.save()
@@ -391,17 +403,13 @@ async def new_trade(
     :param state: The current :class:`GameState`.
     """
     logger.debug(f"Making {resource} trade between {source} and {target}")
-    connectable = False
     source_nation = state.nations[source]
     target_nation = state.nations[target]
-    for source_region_id in source_nation.regions:
-        source_region = state.regions[source_region_id]
-        for target_region_id in target_nation.regions:
-            if region_connected(source_region, target_region_id, state):
-                connectable = True
-                break
-        if connectable:
-            break
+    # Any two ports are connected by sea
+    connectable = (
+        (state.port_regions.get(source) and state.port_regions.get(target))
+        or target in state.bordering_nations(source)
+    )
     
     if not connectable:
         raise errors.NationsNotConnected(
@@ -418,4 +426,5 @@ async def new_trade(
     state.trades[trade.id] = trade
     source_nation.trades.append(trade.id)
     target_nation.trades.append(trade.id)
+    state.bump_version()
     # A nation save isn't necessary here b/c Nation.trades is not persistent
\ No newline at end of file
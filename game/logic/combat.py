@@ -2,8 +2,11 @@ import math
 import random
 from typing import TYPE_CHECKING
 
-from game.data.constants import combat_settings, current_season, battle_result
+from game.data.constants import combat_settings, battle_result
+from game.logic.actions import disband_unit
 from game.logic.map import get_area, move_in_direction, is_coastal
+from game.logic.logistics import refresh_markets
+from game.logic.pathfinding import check_entry, hostile_at
 
 import scripts.errors as errors
 
@@ -13,19 +16,6 @@ if TYPE_CHECKING:
     from game.objs.unit import Unit
     from game.objs.tile import Tile
 
-def at_war(region: "Region", state: "GameState"):
-    """
-    Returns True if there is a hostile unit in the area around the region's
-    capital.
-    """
-    capital = state.tiles[region.location]
-    sensitive_tiles = get_area(capital, state)
-    for unit in state.units.values():
-        if unit.location in sensitive_tiles:
-            return True
-    
-    return False
-
 def unit_effectiveness(
         unit: "Unit", 
         attacking: bool, 
@@ -59,7 +49,7 @@ def unit_effectiveness(
         
     if (tile.location in home_region.tiles):
         eff += combat_settings.home_city_buff
-        if tile is home_tile:
+        if tile == home_tile:
             eff += combat_settings.home_city_buff
         
     allies = state.nations[unit.owner].allies
@@ -97,23 +87,70 @@ async def move_unit(unit: "Unit", direction: str, state: "GameState"):
                                             direction.lower(), state)
     if new_tile.terrain.difficulty > unit.movement_free:
         raise errors.OutOfMovement()
-    if new_tile.terrain.biome == "high_mountains" and current_season == 3:
-        raise errors.TileImpassable("armies cannot enter high mountains during winter")
-    if not new_tile.terrain.is_land and unit.type == "army":
-        raise errors.TileImpassable("armies cannot enter water tiles")
-    if not new_tile.terrain.is_water and unit.type == "fleet":
-        raise errors.TileImpassable("fleets can only move in water")
+    check_entry(unit, new_tile)
     
-    unit.location = new_tile.location
+    old_location = unit.location
+    state.relocate_unit(unit, new_tile.location)
     unit.movement_free -= new_tile.terrain.difficulty
 
-    for global_unit in state.units.values():
-        if (global_unit.location == new_tile.location 
-            and global_unit.owner != unit.owner and 
-            not global_unit.owner in state.nations[unit.owner].allies):
-            await battle(unit, global_unit, last_tile)
+    for other_unit in hostile_at(unit, new_tile.location, state):
+        await battle(unit, other_unit, last_tile.location, state)
+        if unit.id not in state.units:
+            # Destroyed in battle
+            break
     
-    await unit.save()
+    if unit.id in state.units:
+        await unit.save()
+    await refresh_markets([old_location, new_tile.location], state)
+
+async def move_along_path(
+        unit: "Unit", 
+        path: list[tuple[int, int]], 
+        state: "GameState"
+    ):
+    """
+    Moves a unit through a series of neighboring tiles, following the same
+    rules as :func:`move_unit` but saving only once at the end. The whole 
+    path is checked before the unit moves. If the unit runs into hostile 
+    units along the way, it fights them and stops there.
+
+    :param path: The locations to move through in order, not including the
+        unit's current location. See 
+        :func:`game.logic.pathfinding.find_path`.
+    :type path: list[tuple[int, int]]
+    """
+    tiles = state.tiles
+    current = tiles.index(unit.location)
+    cost = 0
+    for location in path:
+        index = tiles.index(location)
+        if index is None or index not in tiles.area(current)[1:]:
+            raise errors.InvalidLocation("Moving", "along a broken path")
+        cost += tiles.difficulty[index]
+        if cost > unit.movement_free:
+            raise errors.OutOfMovement()
+        check_entry(unit, tiles[location])
+        current = index
+    
+    visited = [unit.location]
+    for location in path:
+        last_location = unit.location
+        state.relocate_unit(unit, location)
+        unit.movement_free -= tiles.difficulty[tiles.index(location)]
+        visited.append(location)
+
+        enemies = hostile_at(unit, location, state)
+        for other_unit in enemies:
+            await battle(unit, other_unit, last_location, state)
+            if unit.id not in state.units:
+                # Destroyed in battle
+                break
+        if enemies:
+            break
+    
+    if unit.id in state.units:
+        await unit.save()
+    await refresh_markets(visited, state)
 
 async def retreat(unit: "Unit", state: "GameState"):
     """
@@ -122,22 +159,25 @@ async def retreat(unit: "Unit", state: "GameState"):
     """
     retreat_candidates: list[Tile] = []
     for tile in get_area(state.tiles[unit.location], state):
-        if tile.terrain.difficulty <= unit.movement_free:
-            for unit in state.units.values():
-                if unit.location == tile.location:
-                    # This tile has an enemy, we can't retreat there.
-                    break
-            
-            if (tile.terrain.is_water 
-                and not is_coastal(tile)
-                and unit.type == "army"):
-                break
-            elif (tile.terrain.is_land 
-                and not is_coastal(tile)
-                and unit.type == "fleet"):
-                break
-            
-            retreat_candidates.append(tile)
+        if tile.location == unit.location:
+            continue
+        if tile.terrain.difficulty > unit.movement_free:
+            continue
+        if any(other.owner != unit.owner 
+               for other in state.units_at(tile.location)):
+            # This tile has an enemy, we can't retreat there.
+            continue
+        
+        if (tile.terrain.is_water 
+            and not is_coastal(tile)
+            and unit.type == "army"):
+            continue
+        elif (tile.terrain.is_land 
+            and not is_coastal(tile)
+            and unit.type == "fleet"):
+            continue
+        
+        retreat_candidates.append(tile)
     
     if len(retreat_candidates) == 0:
         # There's nowhere to go!
@@ -146,13 +186,15 @@ async def retreat(unit: "Unit", state: "GameState"):
     effectivenesses = {}
     for tile in retreat_candidates:
         effectivenesses[tile.location] = unit_effectiveness(
-            unit, False, tile.location
+            unit, False, state, tile.location
         )
     best_tile = max(effectivenesses, key=effectivenesses.get)
-    unit.location = best_tile
+    old_location = unit.location
+    state.relocate_unit(unit, best_tile)
 
     unit.movement_free = 0
     await unit.save()
+    await refresh_markets([old_location, best_tile], state)
 
 async def battle_resolve(
         unit: "Unit",
@@ -164,7 +206,8 @@ async def battle_resolve(
     """
     Deals damage to units depending on the scaled impact and the result of the
     battle. Applies stability debuffs, then retreats and sets movement to 0 if
-    needed.
+    needed. A unit left with no strength is destroyed, see 
+    :func:`game.logic.actions.disband_unit`.
     """
     delta_strength = scaled_impact
     delta_morale = scaled_impact
@@ -188,6 +231,9 @@ async def battle_resolve(
     
     unit.strength -= delta_strength
     unit.morale -= delta_morale
+    if unit.strength <= 0:
+        await disband_unit(unit, state)
+        return
 
     nation = state.nations[unit.owner]
     for region_id in nation.regions:
@@ -197,7 +243,7 @@ async def battle_resolve(
             pass
     
     if result in battle_result.RETREATS:
-        await retreat(unit)
+        await retreat(unit, state)
     
     if result in battle_result.LOSES_MOVEMENT:
         unit.movement_free = 0
@@ -216,12 +262,14 @@ def find_allies(
     team = []
 
     for area_tile in get_area(tile, state):
-        for global_unit in state.units.values():
-            if global_unit.location == area_tile.location:
-                # This unit is in a neighboring tile!
-                if (global_unit.owner == unit.owner 
-                    or global_unit.owner in unit_nation.allies):
-                    team.append(global_unit)
+        for area_unit in state.units_at(area_tile.location):
+            if area_unit is unit:
+                continue
+            if (area_unit.owner == unit.owner 
+                or area_unit.owner in unit_nation.allies):
+                team.append(area_unit)
+    
+    return team
 
 def total_effectiveness(
         team: list["Unit"], 
@@ -371,11 +419,14 @@ async def battle(
             result=battle_result.STALEMATE
         )
 
-        attacker.location = last_tile
-        attacker.movement_free = 0
+        if attacker.id in state.units:
+            state.relocate_unit(attacker, last_tile)
+            attacker.movement_free = 0
     
-    await attacker.save()
-    await defender.save()
+    # Units destroyed in the battle have already been deleted
+    for unit in (attacker, defender):
+        if unit.id in state.units:
+            await unit.save()
 
 def crushing_chance(gap: float) -> float:
     """
@@ -0,0 +1,332 @@
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from game.data.constants import (luxury_industries, economy_tolerance,
+                                 economy_max_iterations)
+
+if TYPE_CHECKING:
+    from game.objs.market import Market
+    from game.logic.logistics import EconomySnapshot
+    from world.world import GameState
+
+logger = logging.getLogger(__name__)
+
+goods = ["food", "iron", "copper", "gold", "coal", "oil", "steel",
+         "machinery", "textiles", *luxury_industries]
+"""
+Every resource that is tracked in a market's ledger, whether or not anything
+in the market produces it.
+"""
+bonus_inputs = ["machinery", "steel"]
+"""
+Resources whose fulfillment every industry's production depends on, through
+the machinery and steel bonuses.
+"""
+consumption_inputs = {
+    "coal": ["oil"],
+    "oil": ["coal"],
+    "steel": ["steel"]
+}
+"""
+Resources whose production changes how much of another is consumed. See
+:func:`consumption_rule`.
+"""
+
+@dataclass
+class Ledger:
+    """
+    The solved economy of one market. Production and consumption include the
+    markets it shares each resource with through trades.
+    """
+    production: dict[str, float] = field(default_factory=dict)
+    consumption: dict[str, float] = field(default_factory=dict)
+    fulfillment: dict[str, float] = field(default_factory=dict)
+    """
+    The fraction of consumption that is met by production, 1.0 if there's a
+    surplus.
+    """
+    iterations: int = 0
+    """
+    The most passes the solver took over any group of resources in this
+    market's economy.
+    """
+    converged: bool = True
+    """
+    False if the solver hit :data:`economy_max_iterations` before settling.
+    """
+
+    def supply(self, item: str) -> float:
+        return self.production.get(item, 0) - self.consumption.get(item, 0)
+
+def market_population_tier(market: "Market", state: "GameState",
+                           min_tier: int):
+    """
+    Returns the population of all regions in a market that are greater than or
+    equal to the given minimum tier.
+    """
+    population = 0
+    for region_id in market.regions:
+        region = state.regions[region_id]
+        if not region.city_tier >= min_tier:
+            continue
+        population += region.population
+    return population
+
+def industry_population(market: "Market", state: "GameState", industry: str):
+    """
+    The sum of populations for each region in the target market that has an
+    industry matching the given name. When industries double up, populations
+    count double.
+    """
+    population = 0
+    for region_id in market.regions:
+        region = state.regions[region_id]
+        for region_industry in region.industries:
+            if region_industry.name == industry:
+                population += region.population
+    return population
+
+def local_production(market: "Market", item: str,
+                     state: "GameState") -> float:
+    """
+    Calculates the amount of an item produced by the regions of this market
+    alone, ignoring trades. Industries read the fulfillment of their inputs
+    from the economy being solved.
+    """
+    production = 0
+
+    for region_id in market.regions:
+        region = state.regions[region_id]
+        for industry in region.industries:
+            if industry.output != item:
+                continue
+            production += industry.production(region, state)[1]
+
+    return production
+
+def local_consumption(market: "Market", item: str, state: "GameState",
+                      production: dict[str, float]) -> float:
+    """
+    Calculates the amount of an item that would ideally be consumed by the
+    regions of this market alone, ignoring trades. See 
+    :func:`consumption_rule`.
+
+    :param production: The market's current production of each resource,
+        for the resources listed in :data:`consumption_inputs`.
+    :type production: dict[str, float]
+    """
+    return consumption_rule(
+        item,
+        tier_population=lambda tier: market_population_tier(market, state, 
+                                                            tier),
+        industry_population=lambda name: industry_population(market, state, 
+                                                             name),
+        production=lambda resource: production.get(resource, 0)
+    )
+
+def consumption_rule(
+        item: str,
+        tier_population: Callable[[int], float],
+        industry_population: Callable[[str], float],
+        production: Callable[[str], float]
+    ) -> float:
+    """
+    Calculates the amount of an item that would ideally be consumed by a
+    market. If the resource is in a deficit, this will not reflect actual 
+    change in resource volumes.
+
+    :param tier_population: Returns the population of the market's regions 
+        of at least the given tier.
+    :param industry_population: Returns the population of the market's 
+        regions with the named industry, counted once per industry.
+    :param production: Returns the market's production of a resource. Only
+        called for the resources in :data:`consumption_inputs`.
+    :type tier_population: Callable[[int], float]
+    :type industry_population: Callable[[str], float]
+    :type production: Callable[[str], float]
+    """
+    consumption = 0
+
+    if item == "food":
+        consumption += tier_population(0)
+
+    elif item == "iron":
+        consumption += industry_population("foundry")
+        consumption += industry_population("steelworks")
+    elif item == "copper":
+        consumption += industry_population("foundry")
+
+    elif item == "coal":
+        consumption += industry_population("steelworks")
+
+        energy_consumption = tier_population(2)
+        oil_supply = production("oil")
+        consumption += max(0, energy_consumption - oil_supply)
+    elif item == "oil":
+        energy_consumption = tier_population(2)
+        coal_for_steel = industry_population("steelworks")
+        coal_supply = production("coal")
+        coal_available = coal_supply - coal_for_steel
+        consumption += max(0, energy_consumption - coal_available)
+
+    elif item == "steel":
+        steel_supply = production("steel")
+        steel_for_growth = tier_population(1)
+
+        consumption += max(steel_for_growth, steel_supply)
+
+    elif item == "machinery":
+        consumption += tier_population(0)
+
+    else:
+        # All other resources are luxuries
+        consumption += tier_population(3)
+
+    return consumption
+
+def dependency_graph(markets: Iterable["Market"],
+                     state: "GameState") -> dict[str, set[str]]:
+    """
+    Builds the goods dependency graph of a group of markets. Maps each
+    resource to the resources whose fulfillment or production it depends on,
+    through the industries that make it or through consumption.
+    """
+    graph = {item: set(consumption_inputs.get(item, ())) for item in goods}
+    for market in markets:
+        for region_id in market.regions:
+            for industry in state.regions[region_id].industries:
+                inputs = graph.setdefault(industry.output, set())
+                inputs.update(industry.inputs)
+                inputs.update(bonus_inputs)
+    return graph
+
+def solve_order(graph: dict[str, set[str]]) -> list[list[str]]:
+    """
+    Splits a dependency graph into strongly connected components, ordered so
+    that every component comes after the components it depends on.
+    Resources in the same component depend on each other and have to be
+    solved together.
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    order = []
+
+    def visit(item: str):
+        index[item] = lowlink[item] = len(index)
+        stack.append(item)
+        on_stack.add(item)
+        for dependency in graph.get(item, ()):
+            if dependency not in index:
+                visit(dependency)
+                lowlink[item] = min(lowlink[item], lowlink[dependency])
+            elif dependency in on_stack:
+                lowlink[item] = min(lowlink[item], index[dependency])
+
+        if lowlink[item] == index[item]:
+            component = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                component.append(member)
+                if member == item:
+                    break
+            order.append(component)
+
+    for item in graph:
+        if item not in index:
+            visit(item)
+    return order
+
+def solve(markets: list["Market"], economy: "EconomySnapshot") -> dict[int, Ledger]:
+    """
+    Solves the economy of a group of markets that share resources through
+    trades, and returns their ledgers by market ID.
+
+    Resources are solved in dependency order. Resources that depend on each
+    other are iterated together, starting from full fulfillment, until no
+    fulfillment changes by more than :data:`economy_tolerance` or
+    :data:`economy_max_iterations` passes have been made. The ledgers are
+    registered with the economy before solving starts, so industries read
+    the current estimates through :func:`get_fulfillment` while solving.
+
+    :param markets: Every market in the group. Each market's trade partners
+        for every resource must also be in the group.
+    :param economy: The economy snapshot the ledgers belong to.
+    :type markets: list[Market]
+    :type economy: EconomySnapshot
+    """
+    state = economy.state
+    ledgers = {market.id: Ledger() for market in markets}
+    economy.register(ledgers)
+
+    graph = dependency_graph(markets, state)
+    for component in solve_order(graph):
+        cyclic = len(component) > 1 or component[0] in graph[component[0]]
+        for market in markets:
+            for item in component:
+                ledgers[market.id].fulfillment[item] = 1.0
+
+        converged = False
+        iteration = 0
+        while not converged and iteration < economy_max_iterations:
+            iteration += 1
+            change = _solve_pass(markets, component, ledgers, economy)
+            converged = not cyclic or change <= economy_tolerance
+
+        if not converged:
+            logger.warning(f"Economy did not converge for {component} after "
+                           f"{iteration} iterations (last change {change})")
+        for ledger in ledgers.values():
+            ledger.iterations = max(ledger.iterations, iteration)
+            ledger.converged = ledger.converged and converged
+
+    logger.debug(f"Solved economy of markets {list(ledgers)}")
+    return ledgers
+
+def _solve_pass(markets: list["Market"], items: list[str],
+                ledgers: dict[int, Ledger],
+                economy: "EconomySnapshot") -> float:
+    """
+    Makes one pass over some resources of a group of markets, updating their
+    ledgers. Returns the largest change in fulfillment.
+    """
+    state = economy.state
+    local = {
+        (market.id, item): local_production(market, item, state)
+        for market in markets for item in items
+    }
+    for market in markets:
+        for item in items:
+            ledgers[market.id].production[item] = sum(
+                local[(member.id, item)]
+                for member in economy.trade_group(market, item)
+            )
+
+    local = {
+        (market.id, item): local_consumption(
+            market, item, state, ledgers[market.id].production
+        )
+        for market in markets for item in items
+    }
+    change = 0.0
+    for market in markets:
+        ledger = ledgers[market.id]
+        for item in items:
+            consumption = sum(
+                local[(member.id, item)]
+                for member in economy.trade_group(market, item)
+            )
+            ledger.consumption[item] = consumption
+
+            production = ledger.production[item]
+            if production >= consumption:
+                fulfillment = 1.0
+            else:
+                fulfillment = production / consumption
+            change = max(change, abs(fulfillment - ledger.fulfillment[item]))
+            ledger.fulfillment[item] = fulfillment
+
+    return change
@@ -0,0 +1,147 @@
+import asyncio
+import copy
+import dataclasses
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from game.data.constants import forecast_cache_size
+from game.logic.batch import WorldEconomy
+from game.logic.growth import calculate_tier
+
+if TYPE_CHECKING:
+    from world.world import GameState
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Forecast:
+    """
+    The predicted course of the world's economy over the next few ticks, if
+    nothing else changes. See :func:`forecast`.
+    """
+    ticks: int
+    """
+    How many ticks were simulated.
+    """
+    populations: dict[int, list[float]]
+    """
+    Every region's population now and after each tick, by region ID.
+    """
+    tiers: dict[int, list[int]]
+    """
+    Every region's city tier now and after each tick, by region ID.
+    """
+    shortages: dict[int, list[dict[str, float]]]
+    """
+    The fulfillment of every resource a market doesn't have enough of,
+    during each tick, by market ID.
+    """
+
+_forecast_cache: dict[tuple, Forecast] = {}
+
+forecast_pool = ThreadPoolExecutor(max_workers=1, 
+                                   thread_name_prefix="forecast")
+"""
+The thread forecasts are simulated in, so they don't block the event loop.
+"""
+
+def simulation_state(state: "GameState") -> "GameState":
+    """
+    Returns a copy of the game state that can be ticked without changing the
+    real one. The regions and markets are copied, with the lists a 
+    simulation reads, as they're all a tick changes or reads from another 
+    thread. Everything else is shared, so it mustn't be changed.
+    """
+    regions = {}
+    for region_id, region in state.regions.items():
+        region = copy.copy(region)
+        region.tiles = list(region.tiles)
+        region.industries = list(region.industries)
+        regions[region_id] = region
+
+    markets = {}
+    for market_id, market in state.markets.items():
+        market = copy.copy(market)
+        market.regions = list(market.regions)
+        markets[market_id] = market
+
+    return dataclasses.replace(
+        state,
+        regions=regions,
+        markets=markets,
+        clock=copy.copy(state.clock),
+        version=0,
+        economy=None,
+        political=None
+    )
+
+def simulate(simulation: "GameState", economy: WorldEconomy, 
+             ticks: int) -> Forecast:
+    """
+    Ticks a simulation state, starting from its unsolved economy. Later 
+    ticks reuse the economy's trade pools, so only the simulation's regions 
+    and markets are read, and this is safe to run in :data:`forecast_pool`.
+
+    :param simulation: A copy made by :func:`simulation_state`.
+    :type simulation: :class:`GameState`
+    :param ticks: How many ticks to simulate.
+    :type ticks: int
+    """
+    populations = {region_id: [region.population]
+                   for region_id, region in simulation.regions.items()}
+    tiers = {region_id: [region.city_tier]
+             for region_id, region in simulation.regions.items()}
+    shortages = {market_id: [] for market_id in simulation.markets}
+    for tick in range(ticks):
+        if tick:
+            economy = WorldEconomy(simulation, economy.pools)
+        economy.solve()
+        for market in economy.markets:
+            index = economy.market_index[market.id]
+            shortages[market.id].append({
+                item: fulfillment[index]
+                for item, fulfillment in economy.fulfillment.items()
+                if fulfillment[index] < 1.0
+            })
+
+        growths = economy.growths()
+        for region in simulation.regions.values():
+            region.population += growths[region.id]
+            region.city_tier = calculate_tier(region)
+            populations[region.id].append(region.population)
+            tiers[region.id].append(region.city_tier)
+    return Forecast(ticks, populations, tiers, shortages)
+
+async def forecast(state: "GameState", ticks: int) -> Forecast:
+    """
+    Simulates the growth of every region over a number of ticks, without
+    touching the game state or the database. Each tick's economy is solved
+    at once for the whole world, like a batched tick (see
+    :class:`game.logic.batch.WorldEconomy`).
+
+    The game state is copied and the trades are searched here, and the rest
+    is simulated in :data:`forecast_pool`. Results are cached for each 
+    version of the game state, so players asking again before anything 
+    changes get them for free.
+
+    :param ticks: How many ticks to simulate.
+    :type ticks: int
+    """
+    key = (id(state), state.version, state.clock.tick, ticks)
+    result = _forecast_cache.get(key)
+    if result is not None:
+        return result
+
+    simulation = simulation_state(state)
+    economy = WorldEconomy(simulation)
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(forecast_pool, simulate, simulation, 
+                                        economy, ticks)
+
+    if len(_forecast_cache) >= forecast_cache_size:
+        del _forecast_cache[next(iter(_forecast_cache))]
+    _forecast_cache[key] = result
+    logger.debug(f"Forecast {ticks} ticks of {len(result.populations)} regions")
+    return result
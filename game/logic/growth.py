@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 import logging
 import random
 
@@ -40,11 +40,30 @@ def roll_luxuries(region: "Region", state: "GameState") -> str | None:
 
     return choice
 
-def luxury_count(region: "Region", state: "GameState"):
+def market_supply(region: "Region", 
+                  state: "GameState") -> Callable[[str], float]:
+    """
+    Returns a function giving the supply of a resource in the region's market.
+    """
     market = state.markets[region.market]
+    return lambda item: get_supply(market, item, state)
+
+def luxury_count(
+        region: "Region", 
+        state: "GameState", 
+        supply: Callable[[str], float] | None = None
+    ):
+    if supply is None:
+        supply = market_supply(region, state)
+    return luxury_variety(supply)
+
+def luxury_variety(supply: Callable[[str], float]) -> int:
+    """
+    Returns how many luxuries a market has a surplus of.
+    """
     count = 0
     for luxury in luxury_industries:
-        if get_supply(market, luxury, state) <= 0:
+        if supply(luxury) <= 0:
             continue
         count += 1
     return count
@@ -73,53 +92,78 @@ def region_satisfaction(region: "Region", state: "GameState"):
     luxury_variety = luxury_count(region, state)
     satisfaction *= (region.city_tier - 3) / luxury_variety
 
-def growth_rate(available, regions):
+def growth_rate(available, region_count):
     """
     A helper function for growth() that calculates a rate and whether to finish
     checking resources.
     """
-    rate = available / regions * surplus_use_rate
+    rate = available / region_count * surplus_use_rate
 
     if rate < 0:
         return rate * contract_rate, True
     return rate, True
 
-def growth(region: "Region", state: "GameState"):
+def growth(
+        region: "Region", 
+        state: "GameState", 
+        supply: Callable[[str], float] | None = None
+    ):
     """
     Returns the amount the population of the target region will grow according
     to the current supplies in the market.
+
+    :param supply: Returns the supply of a resource in the region's market.
+        Defaults to the current economy, see :func:`market_supply`.
+    :type supply: Callable[[str], float] | None
     """
     market = state.markets[region.market]
-    regions = market.regions
+    if supply is None:
+        supply = market_supply(region, state)
+    return market_growth(region.city_tier, len(market.regions), supply)
+
+def market_growth(
+        city_tier: int, 
+        region_count: int, 
+        supply: Callable[[str], float]
+    ):
+    """
+    Returns the amount a region will grow from only its city tier and its 
+    market. See :func:`growth`.
+
+    :param city_tier: The tier of the region's core city.
+    :param region_count: The number of regions in the region's market.
+    :param supply: Returns the supply of a resource in the region's market.
+    :type city_tier: int
+    :type region_count: int
+    :type supply: Callable[[str], float]
+    """
     # We'll use some % of our surplus
     food_growth_rate, done = growth_rate(
-        available=get_supply(market, "food", state), 
-        regions=regions
+        available=supply("food"), 
+        region_count=region_count
     )
-    if region.city_tier < 1 or done:
+    if city_tier < 1 or done:
         return food_growth_rate
 
     steel_growth_rate, done = growth_rate(
-        available=get_supply(market, "steel", state),
-        regions=regions
+        available=supply("steel"),
+        region_count=region_count
     )
-    if region.city_tier < 2 or done:
+    if city_tier < 2 or done:
         return min(food_growth_rate, steel_growth_rate)
 
     energy_growth_rate, done = growth_rate(
-        available=get_supply(market, "coal", state) 
-                  + get_supply(market, "oil", state),
-        regions=regions
+        available=supply("coal") + supply("oil"),
+        region_count=region_count
     )
     
     true_growth_rate = min(
         food_growth_rate, energy_growth_rate, steel_growth_rate
     )
-    if region.city_tier < 3 or done:
+    if city_tier < 3 or done:
         return true_growth_rate
 
-    luxury_variety = luxury_count(region, state)
-    if luxury_variety <= region.city_tier - 3:
+    if luxury_variety(supply) <= city_tier - 3:
         # There's not enough variety of luxuries for this region to grow
         return 0
     
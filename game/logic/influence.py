@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import Iterable, TYPE_CHECKING
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,10 +11,16 @@ def calculate_cap(economy: "Econ", state: "GameState") -> int:
     """
     Calculates a new influence cap for an economy.
     """
-    cap = 1
     nation = state.nations[economy.nationid]
-    for region_id in nation.regions:
-        region = state.regions[region_id]
-        cap += region.city_tier + 1
+    return cap_from_tiers(state.regions[region_id].city_tier 
+                          for region_id in nation.regions)
+
+def cap_from_tiers(city_tiers: Iterable[int]) -> int:
+    """
+    Calculates an influence cap from the city tiers of a nation's regions.
+    """
+    cap = 1
+    for city_tier in city_tiers:
+        cap += city_tier + 1
 
     return cap
\ No newline at end of file
@@ -1,48 +1,15 @@
 from typing import TYPE_CHECKING
 
-from game.logic.map import nation_capital, neighbors, has_port
-from game.logic.combat import at_war
+from game.logic.map import get_area, neighbors, has_port, at_war
+from game.logic.equilibrium import Ledger, solve
 
 from game.objs.market import Market
 
 if TYPE_CHECKING:
+    from game.objs.nation import Nation
     from game.objs.region import Region
     from world.world import GameState
 
-def market_population(market: Market, state: "GameState"):
-    population = 0
-    for region_id in market.regions:
-        region = state.regions[region_id]
-        population += region.population
-    return population
-
-def market_population_tier(market: Market, state: "GameState", min_tier: int):
-    """
-    Returns the population of all regions in a market that are greater than or
-    equal to the given minimum tier.
-    """
-    population = 0
-    for region_id in market.regions:
-        region = state.regions[region_id]
-        if not region.city_tier >= min_tier:
-            continue
-        population += region.population
-    return population
-
-def industry_population(market: Market, state: "GameState", industry: str):
-    """
-    The sum of populations for each region in the target market that has an
-    industry matching the given name. When industries double up, populations
-    count double.
-    """
-    population = 0
-    for region_id in market.regions:
-        region = state.regions[region_id]
-        for region_industry in region.industries:
-            if region_industry.name == industry:
-                population += region.population
-    return population
-
 def market_connected(market: Market, target: int, state: "GameState") -> bool:
     """
     Determines if this market is connected to a region by its ID.
@@ -71,162 +38,159 @@ def region_connected(region: "Region", target: int, state: "GameState") -> bool:
     
     return False
 
-def get_production(
-        market: Market, 
-        item: str, 
-        state: "GameState",
-        exclude: list[int] = []
-    ) -> float:
+def markets_connected(market: Market, other: Market, 
+                      state: "GameState") -> bool:
+    """
+    Returns True if any region of one market has a direct logistic connection
+    to a region of the other.
+    """
+    for region_id in other.regions:
+        if market_connected(market, region_id, state):
+            return True
+    
+    return False
+
+class EconomySnapshot:
+    """
+    Holds the solved economy of every market for one version of the game 
+    state. Each market's ledger is solved the first time it's asked for (see
+    :func:`game.logic.equilibrium.solve`), and then shared by every caller 
+    until :attr:`GameState.version` changes. Get the current one with 
+    :func:`get_economy`.
+    """
+    def __init__(self, state: "GameState"):
+        self.state = state
+        self.version = state.version
+        self._ledgers: dict[int, Ledger] = {}
+        self._trade_groups: dict[tuple[int, str], list[Market]] = {}
+
+    def trade_group(self, market: Market, item: str) -> list[Market]:
+        """
+        Returns every market that shares a pool of the item with this one
+        through trades, including itself.
+        """
+        key = (market.id, item)
+        if key in self._trade_groups:
+            return self._trade_groups[key]
+
+        state = self.state
+        group = [market]
+        seen = {market.id}
+        queue = [market]
+        while queue:
+            current = queue.pop()
+            for trade_id in state.nations[current.owner].trades:
+                trade = state.trades[trade_id]
+                if trade.resource != item:
+                    # Ignore irrelevant trades
+                    continue
+
+                for trade_nation_id in trade.nations:
+                    for trade_market_id in state.nations[trade_nation_id].markets:
+                        if trade_market_id in seen:
+                            continue
+                        trade_market = state.markets[trade_market_id]
+                        if not markets_connected(current, trade_market, state):
+                            continue
+                        
+                        seen.add(trade_market_id)
+                        group.append(trade_market)
+                        queue.append(trade_market)
+        
+        self._trade_groups[key] = group
+        return group
+
+    def trading_partners(self, market: Market) -> list[Market]:
+        """
+        Returns every market whose economy depends on this one through trades
+        of any resource, including itself.
+        """
+        partners = {market.id: market}
+        queue = [market]
+        while queue:
+            current = queue.pop()
+            for trade_id in self.state.nations[current.owner].trades:
+                trade = self.state.trades[trade_id]
+                for partner in self.trade_group(current, trade.resource):
+                    if partner.id not in partners:
+                        partners[partner.id] = partner
+                        queue.append(partner)
+        return list(partners.values())
+
+    def register(self, ledgers: dict[int, Ledger]):
+        """
+        Stores ledgers that are about to be solved, so that their estimates 
+        can be read while solving.
+        """
+        self._ledgers.update(ledgers)
+
+    def ledger(self, market: Market) -> Ledger:
+        """
+        Returns the ledger of a market, solving it and its trading partners 
+        first if needed.
+        """
+        ledger = self._ledgers.get(market.id)
+        if ledger is None:
+            solve(self.trading_partners(market), self)
+            ledger = self._ledgers[market.id]
+        return ledger
+
+    def production(self, market: Market, item: str) -> float:
+        return self.ledger(market).production.get(item, 0)
+
+    def consumption(self, market: Market, item: str) -> float:
+        return self.ledger(market).consumption.get(item, 0)
+
+    def supply(self, market: Market, item: str) -> float:
+        return self.ledger(market).supply(item)
+
+    def fulfillment(self, market: Market, item: str) -> float:
+        return self.ledger(market).fulfillment.get(item, 1.0)
+
+def get_economy(state: "GameState") -> EconomySnapshot:
+    """
+    Returns the economy snapshot for the current version of the game state,
+    making a new one if anything has changed since the last.
+    """
+    if state.economy is None or state.economy.version != state.version:
+        state.economy = EconomySnapshot(state)
+    return state.economy
+
+def get_production(market: Market, item: str, state: "GameState") -> float:
     """
     Calculates the amount of an item produced by the regions in this
-    market.
+    market, including the markets it trades the item with.
 
     :param market: The market object to analyze production in.
     :param item: The item type to find the production of.
     :param state: The current game state.
-    :param exclude: The list of market IDs to exclude in trade-level searches.
-        This is used only in its own recursion, so if calling from
-        elsewhere, don't worry about it.
     :type market: :class:`Market`
     :type item: str
     :type state: :class:`GameState`
-    :type exclude: list[int]
     """
-    production = 0
-
-    for region_id in market.regions:
-        region = state.regions[region_id]
-        for industry in region.industries:
-            output = industry.production(region, state)
-            if output[0] != item:
-                continue
-            production += output[1]
-    
-    parent_nation = state.nations[market.owner]
-    for trade_id in parent_nation.trades:
-        trade = state.trades[trade_id]
-        if trade.resource != item:
-            # Ignore irrelevant trades
-            continue
-    
-        for trade_nation_id in trade.nations:
-            if trade_nation_id == market.owner:
-                # Ignore our own ID
-                continue
-            
-            trade_nation = state.nations[trade_nation_id]
-            for trade_market_id in trade_nation.markets:
-                if trade_market_id in exclude:
-                    # Prevent an infinite loop on recursion
-                    continue
+    return get_economy(state).production(market, item)
 
-                if not market_connected(market, trade_market_id, state):
-                    continue
-
-                production += get_production(
-                    market=state.markets[trade_market_id],
-                    item=item,
-                    state=state,
-                    exclude=exclude.append(market.id)
-                )
-    
-    return production
-
-def get_consumption(
-        market: Market, 
-        item: str, 
-        state: "GameState",
-        exclude: list[int] = []
-    ) -> float:
+def get_consumption(market: Market, item: str, state: "GameState") -> float:
     """
     Calculates the amount of an item that would ideally be consumed in this
-    market. If the resource is in a deficit, this will not reflect actual
-    change in resource volumes.
+    market, including the markets it trades the item with. If the resource 
+    is in a deficit, this will not reflect actual change in resource volumes.
 
     :param market: The market object to analyze consumption in.
     :param item: The item type to get the consumption of.
     :param state: The current game state.
-    :param exclude: The market IDs to exclude in trade-level searches. This is 
-        used only to prevent recursion, so don't worry about it if calling
-        from elsewhere.
     :type market: :class:`Market`
     :type item: str
     :type state: :class:`GameState`
-    :type exclude: list[int]
     """
-    consumption = 0
-    
-    if item == "food":
-        consumption += market_population(market, state)
-
-    elif item == "iron":
-        consumption += industry_population(market, state, "foundry")
-        consumption += industry_population(market, state, "steelworks")
-    elif item == "copper":
-        consumption += industry_population(market, state, "foundry")
-
-    elif item == "coal":
-        consumption += industry_population(market, state, "steelworks")
-
-        energy_consumption = market_population_tier(market, state, 2)
-        oil_supply = get_production(market, "oil", state)
-        consumption += max(0, energy_consumption - oil_supply)
-    elif item == "oil":
-        energy_consumption = market_population_tier(market, state, 2)
-        coal_for_steel = industry_population(market, state, "steelworks")
-        coal_supply = get_production(market, "coal", state)
-        coal_available = coal_supply - coal_for_steel
-        consumption += max(0, energy_consumption - coal_available)
-            
-    elif item == "steel":
-        steel_supply = get_production(market, "steel", state)
-        steel_for_growth = market_population_tier(market, state, 1)
-        
-        consumption += max(steel_for_growth, steel_supply)
-
-    elif item == "machinery":
-        consumption += market_population(market, state)
-    
-    else:
-        # All other resources are luxuries
-        consumption += market_population_tier(market, state, 3)
-    
-    parent_nation = state.nations[market.owner]
-    for trade_id in parent_nation.trades:
-        trade = state.trades[trade_id]
-        if trade.resource != item:
-            # Ignore irrelevant trades
-            continue
-
-        for trade_nation_id in trade.nations:
-            if trade_nation_id == market.owner:
-                # Ignore our own ID
-                continue
-
-            trade_nation = state.nations[trade_nation_id]
-            for trade_market_id in trade_nation.markets:
-                if trade_market_id in exclude:
-                    # Prevent an infinite loop on recursion
-                    continue
-
-                if not market_connected(market, trade_market_id, state):
-                    continue
-
-                production += get_consumption(
-                    market=state.markets[trade_market_id],
-                    item=item,
-                    state=state,
-                    exclude=exclude.append(market.id)
-                )
-    
-    return consumption
+    return get_economy(state).consumption(market, item)
 
 def get_supply(market: Market, item: str, state: "GameState") -> float:
     """
     Calculates the current supply of an item in this market, from
     production - consumption.
     """
-    return (get_production(market, item, state) - get_consumption(market, item, state))
+    return get_economy(state).supply(market, item)
 
 def get_fulfillment(
         market: Market | int, 
@@ -235,7 +199,7 @@ def get_fulfillment(
     ) -> float:
     """
     Calculates the fulfillment ratio of an item in the target market. Returns 
-    1.0 if produced > consumed, else returns produced/consumed.
+    1.0 if produced >= consumed, else returns produced/consumed.
 
     :param market: The :class:`Market` object to query or its ID.
     :param item: The name of the item to query.
@@ -247,13 +211,109 @@ def get_fulfillment(
     if isinstance(market, int):
         market = state.markets[market]
 
-    production = get_production(market, item, state)
-    consumption = get_consumption(market, item, state)
-    if production > consumption:
-        return 1.0
-    return production / consumption
+    return get_economy(state).fulfillment(market, item)
+
+def market_groups(nation: "Nation", state: "GameState") -> list[list[int]]:
+    """
+    Splits a nation's regions into the groups that form its markets. The 
+    first group grows from the capital, and each later one from the most 
+    populous region left. A group takes in every region connected to one of 
+    its regions by land or by sea (any two ports are connected), except 
+    regions under threat (see :func:`at_war`), which can only start their 
+    own group.
+
+    Each region is visited once, so this takes time linear in the number of
+    regions and their tiles.
+    """
+    regions = [state.regions[region_id] for region_id in nation.regions]
+    remaining = {region.id for region in regions}
+    threatened = {region.id for region in regions if at_war(region, state)}
+    ports = state.port_regions.get(nation.userid, set())
+
+    seeds = sorted(
+        regions, 
+        key=lambda region: (not region.is_capital, -region.population)
+    )
+    groups = []
+    for seed in seeds:
+        if seed.id not in remaining:
+            continue
+        remaining.discard(seed.id)
+        group = [seed.id]
+        queue = [seed]
+        ports_linked = False
+        while queue:
+            region = queue.pop()
+            linked = neighbors(region, state)
+            if not ports_linked and has_port(region, state):
+                linked = [*linked, *ports]
+                ports_linked = True
+
+            for region_id in linked:
+                if region_id not in remaining or region_id in threatened:
+                    continue
+                remaining.discard(region_id)
+                group.append(region_id)
+                queue.append(state.regions[region_id])
+        
+        groups.append(group)
+    
+    return groups
+
+async def rebuild_markets(nation: "Nation", state: "GameState"):
+    """
+    Rebuilds the markets of one nation, for when one of its regions is 
+    founded, captured or comes under threat. If the markets come out the
+    same, they're left alone and cached economies stay valid.
+    """
+    groups = market_groups(nation, state)
+
+    current = {frozenset(state.markets[market_id].regions) 
+               for market_id in nation.markets}
+    if current == {frozenset(group) for group in groups}:
+        return
+    
+    for market_id in nation.markets:
+        state.markets.pop(market_id, None)
+    nation.markets = []
+
+    for group in groups:
+        market = Market(
+            name=state.regions[group[0]].name,
+            owner=nation.userid,
+            regions=group
+        )
+        state.markets[market.id] = market
+        nation.markets.append(market.id)
+        for region_id in group:
+            state.regions[region_id].market = market.id
+    
+    state.bump_version()
+
+async def refresh_markets(locations: list[tuple[int, int]], 
+                          state: "GameState"):
+    """
+    Rebuilds the markets of every nation with a city in the area around any
+    of the given locations, since units there may have changed which regions
+    are under threat.
+    """
+    nation_ids = set()
+    for location in locations:
+        for tile in get_area(state.tiles[location], state):
+            structure = tile.structure
+            if structure is None or structure.region is None:
+                continue
+            region = state.regions.get(structure.region)
+            if region is not None and region.location == tile.location:
+                nation_ids.add(region.owner)
+    
+    for nation_id in nation_ids:
+        await rebuild_markets(state.nations[nation_id], state)
 
 async def build_markets(state: "GameState"):
+    """
+    Rebuilds every market from scratch. See :func:`market_groups`.
+    """
     state.markets.clear()
     for region in state.regions.values():
         region.market = None
@@ -261,54 +321,6 @@ async def build_markets(state: "GameState"):
         nation.markets = []
     
     for nation in state.nations.values():
-        capital = nation_capital(nation, state)
-        capital_market = Market(
-            name=capital.name,
-            owner=nation.userid,
-            regions=[capital.id]
-        )
-        
-        nation_regions = nation.regions
-        connecting = True
-        while connecting:
-            connecting = False
-            for region_id in nation_regions:
-                if (market_connected(capital_market, region_id, state) 
-                    and region_id not in capital_market.regions
-                    and not at_war(region, state)):
-                    capital_market.regions.append(region_id)
-                    state.regions[region_id].market = capital_market.name
-                    connecting = True
-
-        state.markets[capital_market.id] = capital_market
-        nation.markets.append(capital_market.id)
-
-        isolated_ids = set(nation_regions) - set(capital_market.regions)
-        while len(isolated_ids) != 0:
-            isolated = [state.regions[id] for id in isolated_ids]
-            sorted_regions = sorted(
-                isolated, 
-                key=lambda region: region.population, 
-                reverse=True
-            )
-            largest = sorted_regions[0]
-            new_market = Market(
-                name=largest.name,
-                owner=nation.userid,
-                regions=[largest]
-            )
-            
-            connecting = True
-            while connecting:
-                connecting = False
-                for region_id in isolated_ids:
-                    if (market_connected(new_market, region_id, state) 
-                        and region_id not in new_market.regions
-                        and not at_war(region, state)):
-                        new_market.regions.append(region_id)
-                        state.regions[region_id].market = new_market.name
-                        connecting = True
-            
-            state.markets[new_market.id] = new_market
-            nation.markets.append(capital_market.id)
-            isolated_ids -= set(new_market.regions)
+        await rebuild_markets(nation, state)
+
+    state.bump_version()
@@ -1,90 +1,74 @@
 from typing import TYPE_CHECKING
 
 from game.data.constants import biome_arability, coastal_arability_factor
+from game.objs.tile import Tile
 
 if TYPE_CHECKING:
-    from game.objs.tile import Tile
     from game.objs.nation import Nation
     from game.objs.region import Region
     from game.objs.structure import Structure
     from world.world import GameState
 
+def _step(tile: "Tile", direction: str, state: "GameState") -> "Tile":
+    index = state.tiles.neighbor(tile.index, direction)
+    if index is None:
+        raise KeyError(direction)
+    return Tile(state.tiles, index)
+
 def n(tile: "Tile", state: "GameState") -> "Tile":
     """
     Returns the tile North of the target.
     """
-    return state.tiles[(tile.location[0], tile.location[1] - 1)]
+    return _step(tile, "n", state)
 
 def nw(tile: "Tile", state: "GameState") -> "Tile":
     """
     Returns the tile Northwest of the target.
     """
-    return state.tiles[(tile.location[0] - 1, tile.location[1])]
+    return _step(tile, "nw", state)
 
 def sw(tile: "Tile", state: "GameState") -> "Tile":
-    
     """
     Returns the tile Southwest of the target.
     """
-    return state.tiles[(tile.location[0] - 1, tile.location[1] + 1)]
+    return _step(tile, "sw", state)
 
 def s(tile: "Tile", state: "GameState") -> "Tile":
     """
     Returns the tile South of the target.
     """
-    return state.tiles[(tile.location[0], tile.location[1] + 1)]
+    return _step(tile, "s", state)
 
 def ne(tile: "Tile", state: "GameState") -> "Tile":
     """
     Returns the tile Northeast of the target.
     """
-    return state.tiles[(tile.location[0] + 1, tile.location[1] - 1)]
+    return _step(tile, "ne", state)
 
 def se(tile: "Tile", state: "GameState") -> "Tile":
     """
     Returns the tile Southeast of the target.
     """
-    return state.tiles[(tile.location[0] + 1, tile.location[1])]
+    return _step(tile, "se", state)
 
 def get_area(tile: "Tile", state: "GameState") -> list["Tile"]:
     """
-    Returns all the tiles that directly border the target.
+    Returns the target and all the tiles that directly border it.
     """
-    area = set([tile.location])
-    for fn in (n, nw, ne, s, sw, se):
-        try:
-            area_tile = fn(tile, state)
-            if area_tile is not None:
-                area.add(area_tile.location)
-        except:
-            pass
-    return [state.tiles[location] for location in area]
+    return [Tile(state.tiles, index) for index in state.tiles.area(tile.index)]
 
 def get_metroarea(tile: "Tile", state: "GameState") -> list["Tile"]:
     """
     Returns all the tiles within two of the target.
     """
-    result = set()
-    for area_tile in get_area(tile, state):
-        result.update(get_area(area_tile, state))
-    return list(result)
+    return [Tile(state.tiles, index) for index in state.tiles.metro(tile.index)]
 
-def neighbors(region: "Region", state: "GameState") -> list[int]:
+def neighbors(region: "Region", state: "GameState") -> set[int]:
     """
-    Returns a list of the IDs of the regions that border the target region.
+    Returns a set of the IDs of the regions that border the target region.
+    See :meth:`GameState.adjacent_regions`.
     """
-    neighbors = set()
-
-    for location in region.tiles:
-        tile = state.tiles[location]
-        for neighbor_tile in get_area(tile, state):
-            if neighbor_tile.location in region.tiles:
-                # Ignore our own tiles
-                continue
-
-            neighbors.add(tile.owner)
-    
-    return list(neighbors)
+    return state.adjacent_regions(region.id)
 
 def get_direction_to(source: "Tile", target: "Tile") -> str | None:
     """
@@ -138,16 +122,34 @@ def is_coastal(tile: "Tile") -> bool:
     """
     Returns True if tile.terrain.is_water and tile.terrain.is_land.
     """
-    if tile.terrain.is_water and tile.terrain.is_land:
-        return True
-    else:
-        return False
+    return tile.grid.is_coastal(tile.index)
 
 def has_port(region: "Region", state: "GameState") -> bool:
     """
-    Returns True if the target region's core city is coastal.
+    Returns True if the target region's core city is coastal. See
+    :attr:`GameState.port_regions`.
+    """
+    return region.id in state.port_regions.get(region.owner, ())
+
+def at_war(region: "Region", state: "GameState"):
     """
-    return is_coastal(state.tiles[region.location])
+    Returns True if there is a hostile unit in the area around the region's
+    capital.
+    """
+    if region.location not in state.tiles:
+        # The map editor deleted the city's tile, so nothing can reach it
+        return False
+    capital = state.tiles[region.location]
+    allies = state.nations[region.owner].allies
+    for tile in get_area(capital, state):
+        for unit in state.units_at(tile.location):
+            # Only enemies count. The nation's own units train in and guard
+            # its cities, so counting them would put every city with an army
+            # at war
+            if unit.owner != region.owner and unit.owner not in allies:
+                return True
+    
+    return False
 
 def nation_capital(nation: "Nation", state: "GameState") -> "Region":
     """
@@ -202,7 +204,6 @@ def hex_distance(a: "Tile | tuple[int, int]", b: "Tile | tuple[int, int]") -> in
     else:
         bq, br = b[0], b[1]
     
-    bq, br = b.location
     return (abs(aq - bq)
           + abs(aq + ar - bq - br)
           + abs(ar - br)) // 2
\ No newline at end of file
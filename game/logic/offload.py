@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from game.data.constants import luxury_industries
+from game.logic.batch import WorldEconomy
+from game.logic.growth import market_growth, calculate_tier
+from game.logic.influence import cap_from_tiers
+
+if TYPE_CHECKING:
+    from world.world import GameState
+
+logger = logging.getLogger(__name__)
+
+GROWTH_ITEMS = ["food", "steel", "coal", "oil", *luxury_industries]
+"""
+The resources whose supply decides how a region grows, see
+:func:`game.logic.growth.market_growth`.
+"""
+
+@dataclass(frozen=True)
+class RegionSlice:
+    """
+    The parts of a region a nation's tick needs. Tiers are calculated from
+    these, so :func:`game.logic.growth.calculate_tier` can only use a
+    region's population and city tier.
+    """
+    id: int
+    population: float
+    city_tier: int
+    market: int
+    """
+    The index of the region's market in its :class:`NationJob`.
+    """
+
+@dataclass(frozen=True)
+class NationJob:
+    """
+    Everything needed to tick one nation, copied out of the game state.
+    """
+    nation_id: int
+    markets: list[tuple[int, dict[str, float]]]
+    """
+    The number of regions in each of the nation's markets, and their supply
+    of every resource in :data:`GROWTH_ITEMS`.
+    """
+    regions: list[RegionSlice]
+
+@dataclass(frozen=True)
+class NationResult:
+    """
+    What was worked out for one nation, see :func:`tick_nation`.
+    """
+    nation_id: int
+    growths: dict[int, float]
+    """
+    How much each region grows, by region ID.
+    """
+    tiers: dict[int, int]
+    """
+    The new city tier of each region, by region ID.
+    """
+    influence_cap: int
+
+def tick_nation(job: NationJob) -> NationResult:
+    """
+    Works out the growth, new city tiers and influence cap of one nation.
+    Only uses what's in the job, not the game state.
+    """
+    growths = {}
+    tiers = {}
+    for region in job.regions:
+        region_count, supplies = job.markets[region.market]
+        growths[region.id] = market_growth(
+            region.city_tier, region_count, lambda item: supplies.get(item, 0)
+        )
+        grown = RegionSlice(
+            id=region.id,
+            population=region.population + growths[region.id],
+            city_tier=region.city_tier,
+            market=region.market
+        )
+        tiers[region.id] = calculate_tier(grown)
+    return NationResult(
+        nation_id=job.nation_id,
+        growths=growths,
+        tiers=tiers,
+        influence_cap=cap_from_tiers(tiers.values())
+    )
+
+def nation_jobs(state: "GameState", 
+                economy: WorldEconomy) -> list[NationJob]:
+    """
+    Splits the world into one job per nation, with the supply of each 
+    market taken from a solved economy. Regions in a market the economy 
+    wasn't solved for were founded or moved while it was being solved, so
+    they're left out and don't grow this tick.
+    """
+    jobs = []
+    for nation in state.nations.values():
+        market_index = {}
+        markets = []
+        regions = []
+        for region_id in nation.regions:
+            region = state.regions[region_id]
+            if region.market not in economy.market_index:
+                continue
+            if region.market not in market_index:
+                market = state.markets[region.market]
+                market_index[region.market] = len(markets)
+                markets.append((len(market.regions), {
+                    item: economy.supply(market.id, item) 
+                    for item in GROWTH_ITEMS
+                }))
+            regions.append(RegionSlice(
+                id=region.id,
+                population=region.population,
+                city_tier=region.city_tier,
+                market=market_index[region.market]
+            ))
+        jobs.append(NationJob(nation.userid, markets, regions))
+    return jobs
+
+tick_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tick")
+"""
+The thread the world economy is solved in during an offloaded tick. The 
+solver only reads the columns :class:`WorldEconomy` copied out of the 
+game state, so the event loop can go on changing the state meanwhile.
+
+This used to be a pool of worker processes that ticked nations in 
+parallel, but the per-nation work is so small that sending it to the 
+workers cost as much as doing it, so only the solve is moved off the loop.
+"""
+
+async def offloaded_tick(state: "GameState") -> dict[int, NationResult]:
+    """
+    Solves the whole world's economy in :data:`tick_pool`, so the event 
+    loop isn't blocked by the heaviest part of the tick, then works out 
+    every nation's growth, new city tiers and influence cap back on the 
+    loop. Returns the results by NID.
+    """
+    economy = WorldEconomy(state)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(tick_pool, economy.solve)
+    jobs = nation_jobs(state, economy)
+    logger.debug(f"Ticking {len(jobs)} nations")
+    return {job.nation_id: tick_nation(job) for job in jobs}
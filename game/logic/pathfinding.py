@@ -0,0 +1,211 @@
+import heapq
+import logging
+from typing import TYPE_CHECKING
+
+import game.data.constants as constants
+import scripts.errors as errors
+
+from game.data.constants import biomes
+from game.objs.terrain import LAND, WATER
+
+if TYPE_CHECKING:
+    from game.objs.tile import Tile
+    from game.objs.unit import Unit
+    from world.grid import TileGrid
+    from world.world import GameState
+
+logger = logging.getLogger(__name__)
+
+WINTER = 3
+HIGH_MOUNTAINS = biomes.index("high_mountains")
+
+def blocked_reason(unit_type: str, grid: "TileGrid", index: int) -> str | None:
+    """
+    Returns why a unit of the given type can't enter a tile, ignoring the
+    movement it costs, or None if it can.
+    """
+    if grid.biome[index] == HIGH_MOUNTAINS and constants.current_season == WINTER:
+        return "armies cannot enter high mountains during winter"
+    if not grid.flags[index] & LAND and unit_type == "army":
+        return "armies cannot enter water tiles"
+    if not grid.flags[index] & WATER and unit_type == "fleet":
+        return "fleets can only move in water"
+    return None
+
+def check_entry(unit: "Unit", tile: "Tile"):
+    """
+    Raises :class:`TileImpassable` if the unit can't enter the tile, ignoring
+    the movement it costs.
+    """
+    reason = blocked_reason(unit.type, tile.grid, tile.index)
+    if reason is not None:
+        raise errors.TileImpassable(reason)
+
+def hostile_at(unit: "Unit", location: tuple[int, int],
+               state: "GameState") -> list["Unit"]:
+    """
+    Returns the units at a location that the unit would fight by moving
+    there.
+    """
+    allies = state.nations[unit.owner].allies
+    return [other for other in state.units_at(location)
+            if other.owner != unit.owner and other.owner not in allies]
+
+def _search(
+        unit: "Unit",
+        state: "GameState",
+        budget: int,
+        target: int | None = None,
+        sources: dict[int, int] | None = None
+    ) -> tuple[dict[int, int], dict[int, int]]:
+    """
+    Runs Dijkstra's algorithm over the tiles the unit can enter, out to the
+    given movement budget. Entering a tile costs its difficulty. Tiles with
+    hostile units can be entered but not passed through, since the unit
+    would stop to fight. Stops early once the target index is settled.
+
+    Difficulties can be 0, so no distance heuristic is admissible, and A*
+    would be no better than this.
+
+    Returns the cost of reaching each tile and the tile each was reached
+    from, both by index.
+
+    :param sources: The indices to start from, mapped to the movement 
+        already spent when starting there. Defaults to the unit's location.
+    :type sources: dict[int, int] | None
+    """
+    grid = state.tiles
+    if sources is None:
+        sources = {grid.index(unit.location): 0}
+    costs = dict(sources)
+    previous = {}
+    settled = set()
+    queue = [(cost, index) for index, cost in sources.items()]
+    heapq.heapify(queue)
+    while queue:
+        cost, index = heapq.heappop(queue)
+        if index in settled:
+            continue
+        settled.add(index)
+        if index == target:
+            break
+        if index not in sources and hostile_at(unit, grid.location(index), 
+                                               state):
+            continue
+
+        for neighbor in grid.area(index)[1:]:
+            new_cost = cost + grid.difficulty[neighbor]
+            if new_cost > budget or new_cost >= costs.get(neighbor, budget + 1):
+                continue
+            if blocked_reason(unit.type, grid, neighbor) is not None:
+                continue
+            costs[neighbor] = new_cost
+            previous[neighbor] = index
+            heapq.heappush(queue, (new_cost, neighbor))
+
+    return costs, previous
+
+def reachable(
+        unit: "Unit",
+        state: "GameState",
+        budget: int | None = None
+    ) -> dict[tuple[int, int], int]:
+    """
+    Returns every location the unit can move to with its free movement,
+    mapped to the movement it would cost. Includes the unit's own location.
+
+    :param budget: How much movement to search with. Defaults to the unit's
+        free movement.
+    :type budget: int | None
+    """
+    if budget is None:
+        budget = unit.movement_free
+    costs, previous = _search(unit, state, budget)
+    return {state.tiles.location(index): cost for index, cost in costs.items()}
+
+_reach_cache: dict[tuple, frozenset[tuple[int, int]]] = {}
+REACH_CACHE_SIZE = 256
+
+def reachable_by(
+        units: list["Unit"], 
+        state: "GameState"
+    ) -> frozenset[tuple[int, int]]:
+    """
+    Returns every location that any of the units can move to this season.
+    Units of the same owner and type are searched together in one
+    multi-source search, where each unit starts having already spent the
+    movement it has less than the group's most mobile unit.
+
+    Results are cached by each unit's location and free movement and the
+    season, so hostile units that move afterwards aren't taken into account
+    until one of those changes.
+    """
+    key = (
+        tuple(sorted((unit.id, unit.location, unit.movement_free) 
+                     for unit in units)),
+        constants.current_season
+    )
+    reach = _reach_cache.get(key)
+    if reach is not None:
+        return reach
+
+    groups: dict[tuple[int, str], list["Unit"]] = {}
+    for unit in units:
+        groups.setdefault((unit.owner, unit.type), []).append(unit)
+    
+    grid = state.tiles
+    locations = set()
+    for group in groups.values():
+        budget = max(unit.movement_free for unit in group)
+        sources = {}
+        for unit in group:
+            index = grid.index(unit.location)
+            spent = budget - unit.movement_free
+            sources[index] = min(spent, sources.get(index, spent))
+        
+        costs, previous = _search(group[0], state, budget, sources=sources)
+        locations.update(grid.location(index) for index in costs)
+    
+    reach = frozenset(locations)
+    if len(_reach_cache) >= REACH_CACHE_SIZE:
+        del _reach_cache[next(iter(_reach_cache))]
+    _reach_cache[key] = reach
+    return reach
+
+def find_path(
+        unit: "Unit",
+        target: tuple[int, int],
+        state: "GameState",
+        budget: int | None = None
+    ) -> list[tuple[int, int]] | None:
+    """
+    Finds the cheapest path for a unit to a location. Returns the locations
+    to move through in order, not including the unit's own location, or None
+    if the unit can't get there with its free movement.
+
+    :param target: The location to move to.
+    :param budget: How much movement to search with. Defaults to the unit's
+        free movement.
+    :type target: tuple[int, int]
+    :type budget: int | None
+    """
+    if budget is None:
+        budget = unit.movement_free
+    grid = state.tiles
+    target_index = grid.index(target)
+    if target_index is None:
+        return None
+
+    costs, previous = _search(unit, state, budget, target_index)
+    if target_index not in costs:
+        return None
+
+    path = []
+    index = target_index
+    while index in previous:
+        path.append(grid.location(index))
+        index = previous[index]
+    path.reverse()
+    logger.debug(f"Found path for {unit.name} to {target} costing "
+                 f"{costs[target_index]}: {path}")
+    return path
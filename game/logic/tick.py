@@ -1,47 +1,135 @@
+import asyncio
 import logging
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from game.data.constants import update_season
+import world.database as db
+
+from game.data.constants import set_season, batched_economy, offload_economy
 
 from game.logic.influence import calculate_cap
 from game.logic.growth import growth, calculate_tier
+from game.logic.batch import world_growths
+from game.logic.offload import offloaded_tick
 
 if TYPE_CHECKING:
     from world.world import GameState
 
 logger = logging.getLogger(__name__)
 
-async def tick(state: "GameState"):
+_tick_lock = asyncio.Lock()
+"""
+Stops a forced tick from running at the same time as the daily one.
+"""
+
+async def tick(state: "GameState", batched: bool = batched_economy,
+               offload: bool = offload_economy):
     """
-    Processes a tick of the game system.
+    Processes a tick of the game system. Everything changed by the tick, 
+    along with the advanced :class:`GameClock`, is committed together in one
+    transaction at the end, so a tick is either saved whole or not at all.
+
+    Before it starts, the tick is checkpointed in the clock's phase. If the 
+    bot stops before the tick commits, the database is left as it was before
+    the tick and the phase shows it was interrupted, so it's run again once 
+    the game is loaded. If the tick fails, every change it made is undone.
+
+    :param batched: Whether to solve every market's economy at once with
+        :func:`game.logic.batch.world_growths`, instead of market by market.
+    :param offload: Whether to solve the batched economy in a worker thread
+        instead of on the event loop, see 
+        :func:`game.logic.offload.offloaded_tick`. Needs ``batched``.
+    :type batched: bool
+    :type offload: bool
     """
-    logger.info("Processing game tick...")
-
-    # Region pass
-    for region in state.regions.values():
-        logger.debug(f"Processing region tick for {region.name}")
-        
-        region.population += growth(region)
-        
-        region.city_tier = calculate_tier(region)
-        await region.save()
-
-    # Nation pass
-    for nation in state.nations.values():
-        logger.debug(f"Processing nation tick for {nation.name}")
-
-        for unit_id in nation.units:
-            unit = state.units[unit_id]
-            # Any units that are currently in training graduate
-            if unit.status == "TRAINING":
-                unit.status = ""
-
-        nation.econ.influence_cap = calculate_cap(nation.econ, state)
-        nation.econ.influence = nation.econ.influence_cap
-        
-        await nation.save()
-        await nation.econ.save()
-        logger.debug(f"Tick for {nation.name} complete")
-
-    update_season()
-    logger.info("Game tick complete.")
+    if offload and not batched:
+        raise ValueError("Only the batched economy can be solved off the "
+                         "event loop")
+    async with _tick_lock:
+        await _tick(state, batched, offload)
+
+async def _tick(state: "GameState", batched: bool, offload: bool):
+    clock = state.clock
+    logger.info(f"Processing game tick {clock.tick + 1}...")
+    journal = []
+
+    def change(obj, attr: str, value):
+        # Records the old value so the tick can be undone
+        journal.append((obj, attr, getattr(obj, attr)))
+        setattr(obj, attr, value)
+        db.mark_dirty(obj)
+
+    change(clock, "phase", "regions")
+    await db.barrier()
+
+    try:
+        # Region pass. Every region grows from the same economy, so all 
+        # growths are worked out before any population changes.
+        results = {}
+        tiers = {}
+        if offload:
+            # The only await after the checkpoint. Commands keep running 
+            # while the economy is solved, so regions can be founded or 
+            # change owner, and units, markets and influence can change. 
+            # Growth is added to populations as they are afterwards, and 
+            # regions founded meanwhile wait for the next tick. Besides the
+            # phase, the tick hasn't changed anything yet, and nothing else
+            # runs from here to the commit.
+            results = await offloaded_tick(state)
+            growths = {}
+            for result in results.values():
+                growths.update(result.growths)
+                tiers.update(result.tiers)
+        elif batched:
+            growths = world_growths(state)
+        else:
+            growths = {}
+            for region in state.regions.values():
+                logger.debug(f"Processing region tick for {region.name}")
+                growths[region.id] = growth(region, state)
+
+        for region in state.regions.values():
+            # Regions founded while the economy was solved don't grow yet
+            change(region, "population", 
+                   region.population + growths.get(region.id, 0))
+            change(region, "city_tier", tiers[region.id] if region.id in tiers
+                                        else calculate_tier(region))
+        state.bump_version()
+
+        # Nation pass
+        change(clock, "phase", "nations")
+        for nation in state.nations.values():
+            logger.debug(f"Processing nation tick for {nation.name}")
+
+            for unit_id in nation.units:
+                unit = state.units[unit_id]
+                # Any units that are currently in training graduate
+                if unit.status == "TRAINING":
+                    change(unit, "status", "")
+
+            if nation.userid in results:
+                cap = results[nation.userid].influence_cap
+            else:
+                cap = calculate_cap(nation.econ, state)
+            change(nation.econ, "influence_cap", cap)
+            change(nation.econ, "influence", cap)
+            logger.debug(f"Tick for {nation.name} complete")
+
+        change(clock, "tick", clock.tick + 1)
+        change(clock, "season", (clock.season + 1) % 4)
+        change(clock, "last_tick", datetime.now(timezone.utc).date())
+        change(clock, "phase", "")
+    except Exception:
+        logger.error(f"Tick {clock.tick + 1} failed during the {clock.phase} "
+                     f"phase, undoing it")
+        for obj, attr, value in reversed(journal):
+            setattr(obj, attr, value)
+            db.mark_dirty(obj)
+        state.bump_version()
+        raise
+
+    set_season(clock.season)
+    # Nothing is awaited from the tick's first change to here, so no other 
+    # write can land in the middle of it, and this commits all of it at once
+    await db.barrier()
+    logger.info(f"Game tick {clock.tick} complete.")
@@ -0,0 +1,50 @@
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+import world.database as db
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class GameClock:
+    """
+    Tracks the progress of game time, saved in the database next to the rest
+    of the game so it survives restarts.
+    """
+    tick: int = 0
+    """
+    How many ticks have been processed.
+    """
+    season: int = 0
+    """
+    The current season. 0: spring, 1: summer, 2: autumn, 3: winter.
+    """
+    phase: str = ""
+    """
+    The phase of the tick being processed, or empty between ticks. If this is
+    set when the game is loaded, a tick was interrupted, and since a tick's
+    changes are only ever committed all together, none of it was saved.
+    """
+    last_tick: date | None = None
+    """
+    The UTC date of the last tick that finished.
+    """
+
+    def missed(self) -> int:
+        """
+        Returns how many daily ticks are owed: one for every UTC day since 
+        the last tick finished, or one if the last tick was interrupted 
+        today. A forced tick counts as that day's tick, so it leaves nothing
+        owed until the next day.
+        """
+        if self.last_tick is None:
+            return 1
+        days = (datetime.now(timezone.utc).date() - self.last_tick).days
+        return max(days, 1 if self.phase else 0)
+
+    async def save(self):
+        """
+        Queues the clock to be saved to the database.
+        """
+        await db.save(self)
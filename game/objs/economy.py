@@ -25,6 +25,6 @@ class Econ:
 
     async def save(self):
         """
-        Saves this economy to the database.
+        Queues this economy to be saved to the database.
         """
-        await db.save_economy(self)
\ No newline at end of file
+        await db.save(self)
\ No newline at end of file
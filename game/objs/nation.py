@@ -61,6 +61,6 @@ class Nation:
     
     async def save(self):
         """
-        Saves this nation to the database.
+        Queues this nation to be saved to the database.
         """
-        await db.save_nation(self)
\ No newline at end of file
+        await db.save(self)
\ No newline at end of file
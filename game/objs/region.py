@@ -64,6 +64,7 @@ class Region:
 
     async def save(self):
         """
-        Saves this region to the database.
+        Queues this region to be saved to the database. New regions are
+        inserted right away to get their ID.
         """
-        await db.save_region(self)
\ No newline at end of file
+        await db.save(self)
\ No newline at end of file
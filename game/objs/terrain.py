@@ -1,5 +1,14 @@
 from dataclasses import dataclass, field
-import json
+from typing import TYPE_CHECKING
+
+from game.data.constants import biomes, ore_types
+
+if TYPE_CHECKING:
+    from world.grid import TileGrid
+
+# Terrain bits in TileGrid.flags and compiled map files
+LAND = 1
+WATER = 2
 
 @dataclass
 class Terrain:
@@ -33,10 +42,122 @@ class Terrain:
     "coal", "oil".
     """
     
-    def data(self):
+    def encode(self) -> tuple:
         """
-        Returns a json-safe version of this terrain data to be saved
-        in the database.
+        Returns this terrain as the typed values stored in the tiles table: the
+        biome's index in :data:`biomes`, the land and water bits, the 
+        difficulty, a bitmask of straits (bit n set for side n), then the 
+        richness of each ore in :data:`ore_types` order.
         """
-        return json.dumps([self.biome, self.is_land, self.is_water, 
-                           self.difficulty, self.straits, self.ores])
\ No newline at end of file
+        biome = biomes.index(self.biome) if self.biome is not None else None
+        straits = 0
+        for side in self.straits:
+            straits |= 1 << side
+        
+        return (biome, int(self.is_land), int(self.is_water), self.difficulty,
+                straits, *(self.ores.get(ore, 0.0) for ore in ore_types))
+    
+    @classmethod
+    def decode(cls, biome: int | None, is_land: int, is_water: int, 
+               difficulty: int, straits: int, *ores: float) -> "Terrain":
+        """
+        Rebuilds a terrain object from the values produced by 
+        :meth:`encode`.
+        """
+        return cls(
+            biome=biomes[biome] if biome is not None else None,
+            is_land=bool(is_land),
+            is_water=bool(is_water),
+            difficulty=difficulty,
+            straits=[side for side in range(6) if straits & (1 << side)],
+            ores=dict(zip(ore_types, ores))
+        )
+
+class TerrainView:
+    """
+    The terrain of one tile in a :class:`world.grid.TileGrid`. Has the same
+    attributes as :class:`Terrain`, but reads and writes the grid's arrays
+    directly. The straits and ores are returned as copies, so they must be
+    reassigned to change them.
+    """
+    __slots__ = ("grid", "index")
+
+    def __init__(self, grid: "TileGrid", index: int):
+        self.grid = grid
+        self.index = index
+
+    @property
+    def biome(self) -> str | None:
+        biome = self.grid.biome[self.index]
+        return biomes[biome] if biome >= 0 else None
+    
+    @biome.setter
+    def biome(self, value: str | None):
+        self.grid.biome[self.index] = biomes.index(value) if value is not None else -1
+
+    @property
+    def is_land(self) -> bool:
+        return bool(self.grid.flags[self.index] & LAND)
+    
+    @is_land.setter
+    def is_land(self, value: bool):
+        self._set_flag(LAND, value)
+
+    @property
+    def is_water(self) -> bool:
+        return bool(self.grid.flags[self.index] & WATER)
+    
+    @is_water.setter
+    def is_water(self, value: bool):
+        self._set_flag(WATER, value)
+
+    def _set_flag(self, flag: int, value: bool):
+        if value:
+            self.grid.flags[self.index] |= flag
+        else:
+            self.grid.flags[self.index] &= ~flag
+
+    @property
+    def difficulty(self) -> int:
+        return self.grid.difficulty[self.index]
+    
+    @difficulty.setter
+    def difficulty(self, value: int):
+        self.grid.difficulty[self.index] = value
+
+    @property
+    def straits(self) -> list[int]:
+        mask = self.grid.straits[self.index]
+        return [side for side in range(6) if mask & (1 << side)]
+    
+    @straits.setter
+    def straits(self, value: list[int]):
+        mask = 0
+        for side in value:
+            mask |= 1 << side
+        self.grid.straits[self.index] = mask
+
+    @property
+    def ores(self) -> dict[str, float]:
+        return {ore: self.grid.ores[ore][self.index] for ore in ore_types}
+    
+    @ores.setter
+    def ores(self, value: dict[str, float]):
+        for ore in ore_types:
+            self.grid.ores[ore][self.index] = value.get(ore, 0.0)
+
+    def encode(self) -> tuple:
+        """
+        See :meth:`Terrain.encode`.
+        """
+        biome = self.grid.biome[self.index]
+        flags = self.grid.flags[self.index]
+        return (biome if biome >= 0 else None, int(bool(flags & LAND)), 
+                int(bool(flags & WATER)), self.grid.difficulty[self.index], 
+                self.grid.straits[self.index], 
+                *(self.grid.ores[ore][self.index] for ore in ore_types))
+
+    def __repr__(self) -> str:
+        return (f"TerrainView(biome={self.biome!r}, is_land={self.is_land}, "
+                f"is_water={self.is_water}, difficulty={self.difficulty}, "
+                f"straits={self.straits}, ores={self.ores})")
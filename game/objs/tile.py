@@ -1,39 +1,86 @@
 import logging
 from typing import TYPE_CHECKING
-from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
 import world.database as db
+from game.objs.terrain import TerrainView
 
 if TYPE_CHECKING:
     from game.objs.structure import Structure
     from game.objs.terrain import Terrain
+    from world.grid import TileGrid
 
-@dataclass
 class Tile:
     """
-    A tile on the game map.
-    """
-    terrain: "Terrain"
-    """
-    A terrain object that corresponds to this tile's physical conditions.
-    """
-    location: tuple[int, int]
-    """
-    The (q, r) axial coordinates of this tile on the game map.
-    """
-    owner: int | None = None
-    """
-    The id of the region that owns this tile, if any.
-    """
-    structure: "Structure | None" = None
-    """
-    The player-built structure object on this tile.
+    A tile on the game map. Tiles don't hold any data themselves, they are
+    views of one cell of a :class:`world.grid.TileGrid`. Get them by looking
+    up a location in :attr:`GameState.tiles`, and create new ones with
+    :meth:`TileGrid.add`.
     """
+    __slots__ = ("grid", "index")
+
+    def __init__(self, grid: "TileGrid", index: int):
+        self.grid = grid
+        self.index = index
+
+    @property
+    def terrain(self) -> TerrainView:
+        """
+        A terrain object that corresponds to this tile's physical conditions.
+        """
+        return TerrainView(self.grid, self.index)
+    
+    @terrain.setter
+    def terrain(self, value: "Terrain"):
+        self.grid.set_terrain(self.index, value)
+
+    @property
+    def location(self) -> tuple[int, int]:
+        """
+        The (q, r) axial coordinates of this tile on the game map.
+        """
+        return self.grid.location(self.index)
+
+    @property
+    def owner(self) -> int | None:
+        """
+        The id of the region that owns this tile, if any.
+        """
+        return self.grid.get_owner(self.index)
+    
+    @owner.setter
+    def owner(self, value: int | None):
+        self.grid.set_owner(self.index, value)
+
+    @property
+    def structure(self) -> "Structure | None":
+        """
+        The player-built structure object on this tile.
+        """
+        return self.grid.structures.get(self.index)
+    
+    @structure.setter
+    def structure(self, value: "Structure | None"):
+        if value is None:
+            self.grid.structures.pop(self.index, None)
+        else:
+            self.grid.structures[self.index] = value
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Tile):
+            return NotImplemented
+        return self.grid is other.grid and self.index == other.index
+    
+    def __hash__(self) -> int:
+        return hash((id(self.grid), self.index))
+
+    def __repr__(self) -> str:
+        return (f"Tile(terrain={self.terrain!r}, location={self.location}, "
+                f"owner={self.owner}, structure={self.structure!r})")
 
     async def save(self):
         """
-        Saves this tile to the database.
+        Queues this tile to be saved to the database.
         """
-        await db.save_tile(self)
\ No newline at end of file
+        await db.save(self)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from world.database import save_trade
+import world.database as db
 
 @dataclass
 class Trade:
@@ -16,10 +16,10 @@ class Trade:
     The name of the resource being connected. See :class:`empty_inventory` for
     valid values.
     """
-    id: int | None = field(init=False)
+    id: int | None = field(default=None, init=False)
     """
     The object ID of this trade.
     """
 
     async def save(self):
-        await save_trade(self)
\ No newline at end of file
+        await db.save(self)
\ No newline at end of file
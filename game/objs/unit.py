@@ -56,5 +56,5 @@ class Unit:
     """
     
     async def save(self):
-        await db.save_unit(self)
+        await db.save(self)
     
@@ -5,12 +5,12 @@ import asyncio
 import logging
 import random
 
-from world.database import init_db, get_db, save_tiles
+from world.database import init_db, barrier, delete_tile, save_tiles
 from world.load import load
+from world.mapfile import compile_map
 from scripts.log import log_setup
 from world.world import get_state
 
-from game.objs.tile import Tile
 from game.objs.terrain import Terrain
 
 # === DISCLAIMER REGARDING AI-GENERATED CONTENT ===
@@ -283,7 +283,7 @@ async def update_tile(location: tuple[int, int]):
     if tile is not None:
         if current_brush == None:
             get_state().tiles.pop(location)
-            await get_db().execute("DELETE FROM tiles WHERE (x, y) = (?, ?)", location)
+            await delete_tile(location)
             return
         
         if current_brush == "is_water":
@@ -330,13 +330,7 @@ async def update_tile(location: tuple[int, int]):
             is_water=False,
             difficulty=0
         )
-    new_tile = Tile(
-        terrain=terrain,
-        location=location
-    )
-    get_state().tiles.update({
-        location: new_tile
-    })
+    new_tile = get_state().tiles.add(location, terrain)
     await new_tile.save()
 
 # ===== MAIN LOOP =====
@@ -511,10 +505,11 @@ async def main():
                         if tile is None:
                             pass
                         elif closest_side not in tile.terrain.straits:
-                            tile.terrain.straits.append(closest_side)
+                            tile.terrain.straits = tile.terrain.straits + [closest_side]
                             await tile.save()
                         elif closest_side in tile.terrain.straits:
-                            tile.terrain.straits.remove(closest_side)
+                            tile.terrain.straits = [side for side in tile.terrain.straits 
+                                                    if side != closest_side]
                             await tile.save()
                     
                     else:
@@ -541,7 +536,10 @@ async def main():
 
                 # Save
                 if event.key == pygame.K_ESCAPE:
-                    await get_db().commit()
+                    # Edits are only queued, so write them all out before
+                    # compiling the map from the database
+                    await barrier()
+                    compile_map()
                     logger.info(f"Overlay alignment values are currently: (SIZE: {HEX_SIZE}), (X: {OFFSET_X}), (Y: {OFFSET_Y}) ")
 
                 # ==== Layer selection ====
@@ -1,13 +1,12 @@
+import asyncio
 import logging
 import discord
 import time
-from datetime import datetime, timezone
 from discord.ext import tasks
 
 from world.load import load
 from game.logic.tick import tick
-from world.database import init_db
-from world.database import get_db
+from world.database import init_db, close_db, start_writer
 from world.world import get_state
 
 logger = logging.getLogger(__name__)
@@ -17,7 +16,7 @@ from game.data.constants import OPGUILD_ID, admin_mode
 class NationsBot(discord.Bot):
     def __init__(self, **kwargs):
         kwargs.setdefault("intents", discord.Intents.default())
-        self.db_commit.start()
+        self.loaded = asyncio.Event()
         self.tick.start()
         super().__init__(**kwargs)
 
@@ -25,6 +24,8 @@ class NationsBot(discord.Bot):
         timer = time.perf_counter()
         await init_db()
         await load(get_state())
+        start_writer()
+        self.loaded.set()
         logger.debug(f"Took {(timer / 1000000):.2f}ms to initialize data")
         timer = time.perf_counter()
         self.load_extension("commands.admin")
@@ -35,28 +36,33 @@ class NationsBot(discord.Bot):
         if admin_mode:
             logger.warning("Started in admin mode!")
 
-    @tasks.loop(minutes=5)
-    async def db_commit(self):
+    async def close(self):
         logger.info("Committing database...")
         try:
-            await get_db().commit()
+            await close_db()
             logger.info("Committed all database changes")
-        except RuntimeError:
-            # This is raised on startup because the initial database commit always fails
-            logger.debug("Initial commit failed, this is expected behavior")
         except Exception as e:
             logger.error(f"Unable to commit database: {e}")
-            raise
+        await super().close()
     
     @tasks.loop(hours=1)
     async def tick(self):
-        if datetime.now(timezone.utc).hour == 0:
+        # Runs the first check after midnight UTC, and catches up on every 
+        # tick that was missed or interrupted while the bot was down
+        missed = get_state().clock.missed()
+        if missed > 1:
+            logger.warning(f"Catching up on {missed} missed game ticks")
+        for _ in range(missed):
             try:
                 await tick(get_state())
             except Exception as e:
                 logger.error(f"Failed to execute game tick: {e}")
                 raise
 
+    @tick.before_loop
+    async def before_tick(self):
+        await self.loaded.wait()
+
 bot = NationsBot()
 
 async def sync(bot: NationsBot) -> None:
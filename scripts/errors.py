@@ -85,6 +85,12 @@ class TileImpassable(NationsException):
         super().__init__(f"Unit was unable to move to a tile because {reason}.")
         self.user_message = reason.capitalize() + "!"
 
+class NoPath(NationsException):
+    def __init__(self, location: tuple[int, int]):
+        super().__init__(f"Unit could not find a path to {location}")
+        self.user_message = f"""That unit can't reach {location} with the 
+                            movement it has left this season!"""
+
 class TooManyStructures(NationsException):
     def __init__(self, action: str, num_structures: int):
         super().__init__(f"""{action} failed: Region already has its max of
@@ -0,0 +1,158 @@
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from PIL import Image
+
+from game.data.constants import map_zoom_levels, pyramid_cache_size
+
+logger = logging.getLogger(__name__)
+
+MAP_IMAGE = Path("assets/map.png")
+PYRAMID_DIR = Path("assets/pyramid")
+
+TILE_SIZE = 512
+"""
+The width and height in pixels of every tile of the pyramid, at every zoom
+level.
+"""
+_META = "pyramid.json"
+
+def build_pyramid(source: Path = MAP_IMAGE, destination: Path = PYRAMID_DIR,
+                  levels: int = map_zoom_levels):
+    """
+    Slices the map image into a tile pyramid. Zoom level 0 is the image at
+    full resolution, and each level after it is half the size of the one
+    before. Every level is cut into :data:`TILE_SIZE` square tiles, saved as
+    ``<zoom>/<column>_<row>.png``, so views only ever decode the tiles they
+    cover.
+
+    :param source: The full resolution map image.
+    :param destination: The directory to write the pyramid to. Anything
+        already there is replaced.
+    :param levels: How many zoom levels to build.
+    :type source: Path
+    :type destination: Path
+    :type levels: int
+    """
+    destination = Path(destination)
+    temp_path = destination.with_name(destination.name + ".tmp")
+    if temp_path.exists():
+        shutil.rmtree(temp_path)
+    temp_path.mkdir(parents=True)
+
+    image = Image.open(source).convert("RGBA")
+    width, height = image.size
+    tiles = 0
+    for zoom in range(levels):
+        if zoom:
+            image = image.reduce(2)
+        level_path = temp_path / str(zoom)
+        level_path.mkdir()
+        for column in range(math.ceil(image.width / TILE_SIZE)):
+            for row in range(math.ceil(image.height / TILE_SIZE)):
+                x, y = column * TILE_SIZE, row * TILE_SIZE
+                tile = image.crop((x, y, x + TILE_SIZE, y + TILE_SIZE))
+                tile.save(level_path / f"{column}_{row}.png")
+                tiles += 1
+
+    (temp_path / _META).write_text(json.dumps({
+        "width": width,
+        "height": height,
+        "levels": levels,
+        "tile_size": TILE_SIZE
+    }))
+    if destination.exists():
+        shutil.rmtree(destination)
+    os.replace(temp_path, destination)
+    logger.info(f"Built a {levels} level pyramid of {tiles} tiles from "
+                f"{source} into {destination}")
+
+def pyramid_is_current(source: Path = MAP_IMAGE,
+                       destination: Path = PYRAMID_DIR) -> bool:
+    """
+    Returns True if the pyramid exists, is newer than its source and has the
+    configured zoom levels and tile size.
+    """
+    meta_path = Path(destination) / _META
+    if not meta_path.exists():
+        return False
+    meta = json.loads(meta_path.read_text())
+    if meta["levels"] != map_zoom_levels or meta["tile_size"] != TILE_SIZE:
+        return False
+    if not Path(source).exists():
+        return True
+    return os.path.getmtime(meta_path) >= os.path.getmtime(source)
+
+class Pyramid:
+    """
+    A tile pyramid built by :func:`build_pyramid`. Tiles are decoded the
+    first time they're needed, and the most recently used ones are kept
+    decoded. Safe to use from several render threads at once.
+    """
+    def __init__(self, path: Path = PYRAMID_DIR,
+                 size: int = pyramid_cache_size):
+        self.path = Path(path)
+        self.size = size
+        meta = json.loads((self.path / _META).read_text())
+        self.width = meta["width"]
+        self.height = meta["height"]
+        self.levels = meta["levels"]
+        self._tiles: dict[tuple[int, int, int], Image.Image | None] = {}
+        self._lock = threading.Lock()
+
+    def tile(self, zoom: int, column: int, row: int) -> Image.Image | None:
+        """
+        Returns a decoded tile, or None if it's off the map.
+        """
+        key = (zoom, column, row)
+        with self._lock:
+            if key in self._tiles:
+                # Move it to the back, so it's evicted last
+                tile = self._tiles.pop(key)
+                self._tiles[key] = tile
+                return tile
+
+        tile = None
+        path = self.path / str(zoom) / f"{column}_{row}.png"
+        if path.exists():
+            with Image.open(path) as file:
+                tile = file.convert("RGBA")
+
+        with self._lock:
+            self._tiles.pop(key, None)
+            if len(self._tiles) >= self.size:
+                del self._tiles[next(iter(self._tiles))]
+            self._tiles[key] = tile
+        return tile
+
+    def crop(self, box: tuple[int, int, int, int], zoom: int) -> Image.Image:
+        """
+        Returns the part of a zoom level inside a pixel box, measured in
+        that level's pixels. Anything off the map is transparent.
+        """
+        x_min, y_min, x_max, y_max = box
+        image = Image.new("RGBA", (x_max - x_min, y_max - y_min))
+        for column in range(x_min // TILE_SIZE, (x_max - 1) // TILE_SIZE + 1):
+            for row in range(y_min // TILE_SIZE, (y_max - 1) // TILE_SIZE + 1):
+                tile = self.tile(zoom, column, row)
+                if tile is not None:
+                    image.paste(tile, (column * TILE_SIZE - x_min,
+                                       row * TILE_SIZE - y_min))
+        return image
+
+def open_pyramid() -> Pyramid | None:
+    """
+    Opens the pyramid if it exists and is up to date with the map image,
+    otherwise returns None.
+    """
+    if not pyramid_is_current():
+        return None
+    return Pyramid()
+
+if __name__ == "__main__":
+    build_pyramid()
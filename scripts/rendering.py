@@ -1,11 +1,26 @@
 from PIL import Image
+import asyncio
+import io
 import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import cache
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from game.data.constants import (render_workers, snapshot_format,
+                                 snapshot_options, political_chunk_limit,
+                                 snapshot_cache_size)
+from game.logic.pathfinding import reachable_by
+from scripts.pyramid import MAP_IMAGE, open_pyramid
 
 logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
+    from game.objs.unit import Unit
+    from world.grid import TileGrid
     from world.world import GameState
 
 HEX_WIDTH = 78.7
@@ -15,14 +30,20 @@ ANCHOR_Q = -65
 ANCHOR_R = -8
 
 source_image = None
-map_path = Path("assets/map.png")
-if not map_path.exists():
-    map_path.parent.mkdir(parents=True, exist_ok=True)
-    map_path.write_text("")
-    logger.error("Booted with no map image. Insert an image at /assets/map.png. " \
-    "Mapping utilities will not work.")
-else:
-    source_image = Image.open(map_path).convert("RGBA")
+map_path = MAP_IMAGE
+# The whole image is only loaded if there's no pyramid to draw from
+pyramid = open_pyramid()
+if pyramid is None:
+    if not map_path.exists():
+        map_path.parent.mkdir(parents=True, exist_ok=True)
+        map_path.write_text("")
+        logger.error("Booted with no map image. Insert an image at /assets/map.png. " \
+        "Mapping utilities will not work.")
+    else:
+        source_image = Image.open(map_path).convert("RGBA")
+        logger.warning("The map tile pyramid is missing or out of date, so "
+                       "the whole map image was loaded. Run `python -m "
+                       "scripts.pyramid` to build it.")
 
 overlay_sprites = {
     "outpost": Image.open("assets/overlays/outpost.png").convert("RGBA"),
@@ -33,6 +54,14 @@ overlay_sprites = {
     "hex_mask": Image.open("assets/overlays/hex_mask.png").convert("RGBA").getchannel("A")
 }
 
+CHUNK_SIZE = 512
+"""
+The width and height in pixels of each chunk of the political layer.
+"""
+
+HIGHLIGHT_COLOR = (255, 255, 255)
+HIGHLIGHT_OPACITY = 0.45
+
 def n_corner(q, r) -> tuple[int, int]:
     """
     Finds the n-corner (top left) in rectangular image coordinates of a hex 
@@ -52,66 +81,482 @@ def m_corner(q, r) -> tuple[int, int]:
         1/2 * HEX_HEIGHT * (q - ANCHOR_Q + 2) + HEX_HEIGHT * (r - ANCHOR_R)
     )
 
-def snapshot_corners(corner1: tuple[int, int], corner2: tuple[int, int], 
-                     state: "GameState", 
-                     overlays: dict[tuple[int, int], str] = {}) -> Image.Image:
+@dataclass(frozen=True)
+class LayerChunk:
+    """
+    One square of the political map overlay, :data:`CHUNK_SIZE` pixels 
+    across. See :class:`PoliticalLayer`.
+    """
+    key: tuple[int, int, int]
+    """
+    The chunk's (zoom, column, row) in the grid of chunks over that zoom 
+    level of the map.
+    """
+    stamp: tuple
+    """
+    The tile owner, region owner and nation color versions the chunk was
+    drawn for.
+    """
+    fills: tuple[tuple[tuple[int, int], tuple[int, int, int]], ...]
+    """
+    The (q, r) coordinates of each owned cell touching the chunk, paired 
+    with the color of the nation that owns it.
+    """
+    image: Image.Image | None = field(default=None, compare=False)
+    """
+    The drawn overlay, or None if it hasn't been drawn yet or nothing in the
+    chunk is owned.
+    """
+
+    @property
+    def drawn(self) -> bool:
+        return self.image is not None or not self.fills
+
+class PoliticalLayer:
+    """
+    The political map, with every owned cell tinted in its nation's color, 
+    kept as a transparent overlay over the source image. It's cut into 
+    chunks that are drawn the first time a snapshot needs them and reused
+    by every later snapshot, so a snapshot is a crop of the source image and
+    one composite per chunk rather than one paste per owned cell.
+
+    A chunk is checked again whenever :attr:`TileGrid.owner_version`,
+    :attr:`GameState.region_owner_version` or a nation's color changes, and
+    only redrawn if its own cells changed. Get the current one with 
+    :func:`get_layer`.
+    """
+    def __init__(self, grid: "TileGrid"):
+        self.grid = grid
+        self._chunks: dict[tuple[int, int, int], LayerChunk] = {}
+        self._lock = threading.Lock()
+
+    def chunk(self, key: tuple[int, int, int], state: "GameState", 
+              stamp: tuple) -> LayerChunk:
+        """
+        Returns the chunk with the given key. If the tiles or colors have
+        changed since it was drawn and its cells are different, the chunk
+        that's returned still needs to be drawn, with :meth:`draw`.
+        """
+        cached = self._chunks.get(key)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+
+        zoom, column, row = key
+        scale = 2 ** zoom
+        x, y = column * CHUNK_SIZE * scale, row * CHUNK_SIZE * scale
+        # Cells wholly inside this box are every cell touching the chunk
+        box = (x - HEX_WIDTH, y - HEX_HEIGHT, 
+               x + CHUNK_SIZE * scale + HEX_WIDTH, 
+               y + CHUNK_SIZE * scale + HEX_HEIGHT)
+        fills = tuple(owned_cells(cells_in(box), state))
+
+        if cached is not None and cached.fills == fills:
+            chunk = replace(cached, stamp=stamp)
+            self.store(chunk)
+            return chunk
+        return LayerChunk(key=key, stamp=stamp, fills=fills)
+
+    def draw(self, chunk: LayerChunk) -> LayerChunk:
+        """
+        Draws a chunk and caches it. This doesn't read the game state, so
+        it's safe to run in :data:`render_pool`.
+        """
+        zoom, column, row = chunk.key
+        x, y = column * CHUNK_SIZE, row * CHUNK_SIZE
+        image = Image.new("RGBA", (CHUNK_SIZE, CHUNK_SIZE))
+        for location, color in chunk.fills:
+            n_x, n_y = pixel(location, zoom)
+            composite(image, tinted_mask(color, zoom), n_x - x, n_y - y)
+        
+        chunk = replace(chunk, image=image)
+        self.store(chunk)
+        return chunk
+
+    def store(self, chunk: LayerChunk):
+        with self._lock:
+            self._chunks.pop(chunk.key, None)
+            if len(self._chunks) >= political_chunk_limit:
+                # Forget the oldest chunk
+                del self._chunks[next(iter(self._chunks))]
+            self._chunks[chunk.key] = chunk
+
+def get_layer(state: "GameState") -> PoliticalLayer:
+    """
+    Returns the political layer for the current tiles, making a new one if 
+    the map has been reloaded.
+    """
+    if state.political is None or state.political.grid is not state.tiles:
+        state.political = PoliticalLayer(state.tiles)
+        # Versions start over with the new tiles
+        snapshot_cache.clear()
+    return state.political
+
+@cache
+def scaled(sprite: str, zoom: int) -> Image.Image:
+    """
+    Returns one of the :data:`overlay_sprites` shrunk to a zoom level.
+    """
+    image = overlay_sprites[sprite]
+    if zoom == 0:
+        return image
+    scale = 2 ** zoom
+    size = (max(1, round(image.width / scale)), 
+            max(1, round(image.height / scale)))
+    return image.resize(size, Image.Resampling.BOX)
+
+@cache
+def scaled_highlight(zoom: int) -> Image.Image:
+    return scaled("hex_mask", zoom).point(
+        lambda alpha: int(alpha * HIGHLIGHT_OPACITY)
+    )
+
+@cache
+def tinted_mask(color: tuple[int, int, int], zoom: int = 0) -> Image.Image:
+    """
+    Returns a hex of the given color at a zoom level, transparent outside 
+    the hex mask.
+    """
+    mask = scaled("hex_mask", zoom)
+    sprite = Image.new("RGBA", mask.size, color)
+    sprite.putalpha(mask)
+    return sprite
+
+def composite(image: Image.Image, sprite: Image.Image, x: int, y: int):
+    """
+    Alpha composites a sprite onto an image with its top left corner at
+    (x, y), clipping whatever falls outside the image.
+    """
+    left, top = max(0, -x), max(0, -y)
+    width = min(sprite.width - left, image.width - x - left)
+    height = min(sprite.height - top, image.height - y - top)
+    if width <= 0 or height <= 0:
+        return
+    image.alpha_composite(sprite, dest=(x + left, y + top),
+                          source=(left, top, left + width, top + height))
+
+@dataclass(frozen=True)
+class MapView:
+    """
+    Everything needed to render one snapshot, copied out of the game state so
+    it can be rendered off the event loop while the state keeps changing.
+    """
+    corner1: tuple[int, int]
+    corner2: tuple[int, int]
+    zoom: int = 0
+    """
+    The zoom level of the map to draw from. Each level is half the size of
+    the one before, starting from full size at 0.
+    """
+    chunks: tuple[LayerChunk, ...] = ()
+    """
+    The chunks of the political layer that the image covers.
+    """
+    overlays: tuple[tuple[tuple[int, int], str], ...] = ()
+    """
+    The (q, r) coordinates of cells to draw a sprite onto, paired with the
+    name of the sprite.
+    """
+    highlights: frozenset[tuple[int, int]] = frozenset()
+    stamp: tuple = ()
+    """
+    The tile owner, region owner and nation color versions the view was made
+    at.
+    """
+    layer: PoliticalLayer | None = field(default=None, compare=False)
+    """
+    The layer to cache chunks in once they're drawn.
+    """
+
+    @property
+    def key(self) -> tuple:
+        """
+        Identifies the image this view renders to. Views with the same key
+        render the same image.
+        """
+        return (self.corner1, self.corner2, self.zoom, self.overlays, 
+                self.highlights,
+                self.stamp)
+
+class SnapshotCache:
+    """
+    Keeps the most recently used encoded snapshots, keyed by 
+    :attr:`MapView.key`, so that players looking at the same area between
+    changes to the map don't render it again each time.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._snapshots: dict[tuple, bytes] = {}
+
+    def get(self, key: tuple) -> bytes | None:
+        snapshot = self._snapshots.pop(key, None)
+        if snapshot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Move it to the back, so it's evicted last
+        self._snapshots[key] = snapshot
+        return snapshot
+
+    def put(self, key: tuple, snapshot: bytes):
+        self._snapshots.pop(key, None)
+        if len(self._snapshots) >= self.size:
+            del self._snapshots[next(iter(self._snapshots))]
+        self._snapshots[key] = snapshot
+
+    def clear(self):
+        self._snapshots.clear()
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def __repr__(self) -> str:
+        return (f"SnapshotCache({len(self)}/{self.size} snapshots, "
+                f"{self.hits} hits, {self.misses} misses)")
+
+snapshot_cache = SnapshotCache(snapshot_cache_size)
+
+def bounds(corner1: tuple[int, int], 
+           corner2: tuple[int, int]) -> tuple[float, float, float, float]:
+    """
+    Returns the (left, top, right, bottom) pixel box of the source image
+    covered by a snapshot between two corner cells.
+    """
+    x_min, y_min = n_corner(*corner1)
+    x_max, y_max = m_corner(*corner2)
+    return x_min, y_min, x_max, y_max
+
+def contains(box: tuple[float, float, float, float], 
+             location: tuple[int, int]) -> bool:
+    """
+    Returns True if a cell lies wholly inside a pixel box from 
+    :func:`bounds`. Half-represented cells don't get overlays.
+    """
+    x_min, y_min, x_max, y_max = box
+    n_x, n_y = n_corner(*location)
+    m_x, m_y = m_corner(*location)
+    return x_min <= n_x and x_max >= m_x and y_min <= n_y and y_max >= m_y
+
+def cells_in(box: tuple[float, float, float, float]
+             ) -> Iterator[tuple[int, int]]:
+    """
+    Iterates over the (q, r) coordinates of every cell wholly inside a pixel
+    box, by inverting :func:`n_corner` and :func:`m_corner`, so the work done
+    depends on the size of the box rather than the size of the map.
+    """
+    x_min, y_min, x_max, y_max = box
+    # A cell spans HEX_WIDTH across from its n-corner and HEX_HEIGHT down.
+    # Ranges are widened by one on each side so rounding can't drop a cell,
+    # and the extras are filtered out by contains()
+    q_first = math.ceil(x_min / (3/4 * HEX_WIDTH)) + ANCHOR_Q - 1
+    q_last = math.floor((x_max - HEX_WIDTH) / (3/4 * HEX_WIDTH)) + ANCHOR_Q + 1
+    for q in range(q_first, q_last + 1):
+        slant = 1/2 * HEX_HEIGHT * (q - ANCHOR_Q)
+        r_first = math.ceil((y_min - slant) / HEX_HEIGHT) + ANCHOR_R - 1
+        r_last = (math.floor((y_max - HEX_HEIGHT - slant) / HEX_HEIGHT) 
+                  + ANCHOR_R + 1)
+        for r in range(r_first, r_last + 1):
+            if contains(box, (q, r)):
+                yield (q, r)
+
+def owned_cells(
+        locations: Iterable[tuple[int, int]], 
+        state: "GameState"
+    ) -> Iterator[tuple[tuple[int, int], tuple[int, int, int]]]:
+    """
+    Pairs each owned cell among the locations with the color of the nation
+    that owns it.
+    """
+    grid = state.tiles
+    for location in locations:
+        index = grid.index(location)
+        if index is None:
+            continue
+        owner = grid.get_owner(index)
+        if owner is not None:
+            nid = state.regions[owner].owner
+            yield (location, state.nations[nid].color.to_rgb())
+
+def pixel_box(corner1: tuple[int, int], corner2: tuple[int, int], 
+              zoom: int = 0) -> tuple[int, int, int, int]:
+    """
+    Scales :func:`bounds` to a zoom level and rounds it to whole pixels.
+    """
+    scale = 2 ** zoom
+    return tuple(round(edge / scale) for edge in bounds(corner1, corner2))
+
+def pixel(location: tuple[int, int], zoom: int = 0) -> tuple[int, int]:
+    """
+    Returns the n-corner of a cell in whole pixels at a zoom level.
+    """
+    scale = 2 ** zoom
+    n_x, n_y = n_corner(*location)
+    return (round(n_x / scale), round(n_y / scale))
+
+def base_image(box: tuple[int, int, int, int], zoom: int) -> Image.Image:
+    """
+    Returns the part of the map image inside a pixel box at a zoom level, 
+    from the tile pyramid if it's been built.
+    """
+    if pyramid is not None:
+        return pyramid.crop(box, zoom)
+    if zoom == 0:
+        return source_image.crop(box)
+    scale = 2 ** zoom
+    x_min, y_min, x_max, y_max = box
+    return source_image.crop(tuple(edge * scale for edge in box)).resize(
+        (x_max - x_min, y_max - y_min), Image.Resampling.BOX
+    )
+
+def map_view(corner1: tuple[int, int], corner2: tuple[int, int], 
+             state: "GameState", 
+             overlays: dict[tuple[int, int], str] = {},
+             highlights: set[tuple[int, int]] = frozenset(),
+             zoom: int = 0) -> MapView:
     """
-    Takes a rectangular snapshot of the source image based on
-    axial hex coordinates.
+    Copies what a snapshot between two corner cells needs out of the game
+    state, to be rendered with :func:`encode_snapshot`.
     
     :param corner1: The (q, r) coordinates of the top-left cell in the image.
-    :param corner2: The (q, r) coordinates ot the bottom-right cell in the 
+    :param corner2: The (q, r) coordinates of the bottom-right cell in the 
         image.
     :param overlays: A set of custom sprites to overlay onto the map. The keys
         are the (q, r) coordinates of the cell to overlay onto, and the values
         are the names of the corresponding structures.
+    :param highlights: The (q, r) coordinates of cells to tint, drawn over 
+        ownership colors and under overlays.
+    :param zoom: The zoom level to draw from, see :attr:`MapView.zoom`.
     :type corner1: tuple[int, int]
     :type corner2: tuple[int, int]
     :type overlays: dict[tuple[int, int], str]
+    :type highlights: set[tuple[int, int]]
+    :type zoom: int
     """
+    layer = get_layer(state)
+    stamp = (
+        state.tiles.owner_version,
+        state.region_owner_version,
+        tuple(nation.color.value for nation in state.nations.values())
+    )
+    x_min, y_min, x_max, y_max = pixel_box(corner1, corner2, zoom)
+    chunks = tuple(
+        layer.chunk((zoom, column, row), state, stamp)
+        for column in range(x_min // CHUNK_SIZE, (x_max - 1) // CHUNK_SIZE + 1)
+        for row in range(y_min // CHUNK_SIZE, (y_max - 1) // CHUNK_SIZE + 1)
+    )
 
-    q1, r1 = corner1
-    q2, r2 = corner2
+    return MapView(
+        corner1=corner1,
+        corner2=corner2,
+        zoom=zoom,
+        chunks=chunks,
+        overlays=tuple(overlays.items()),
+        highlights=frozenset(highlights),
+        stamp=stamp,
+        layer=layer
+    )
+
+def render(view: MapView) -> Image.Image:
+    """
+    Draws a snapshot of the source image. This only reads the view and the
+    loaded sprites, so it's safe to run in :data:`render_pool`.
+    """
+    zoom = view.zoom
+    box = bounds(view.corner1, view.corner2)
+    x_min, y_min, x_max, y_max = pixel_box(view.corner1, view.corner2, zoom)
+    snapshot = base_image((x_min, y_min, x_max, y_max), zoom)
 
-    x_min, y_min = n_corner(q1, r1)
-    x_max, y_max = m_corner(q2, r2)
+    def offset(location: tuple[int, int]) -> tuple[int, int]:
+        # The coordinates of the sprite on the cropped map
+        n_x, n_y = pixel(location, zoom)
+        return (n_x - x_min, n_y - y_min)
 
-    snapshot = source_image.crop((x_min, y_min, x_max, y_max))
+    for chunk in view.chunks:
+        if not chunk.drawn:
+            chunk = view.layer.draw(chunk)
+        if chunk.image is not None:
+            chunk_zoom, column, row = chunk.key
+            composite(snapshot, chunk.image, 
+                      column * CHUNK_SIZE - x_min, row * CHUNK_SIZE - y_min)
 
-    for location, tile in state.tiles.items():
-        qt, rt = location
+    highlight = scaled_highlight(zoom)
+    for location in view.highlights:
+        if contains(box, location):
+            snapshot.paste(im=HIGHLIGHT_COLOR, box=offset(location), 
+                           mask=highlight)
+
+    # Allows for custom overlays in specific locations
+    for location, name in view.overlays:
+        if contains(box, location):
+            sprite = scaled(name, zoom)
+            snapshot.paste(im=sprite, box=offset(location), mask=sprite)
 
-        n_x, n_y = n_corner(qt, rt)
-        m_x, m_y = m_corner(qt, rt)
-        # The coordinates of the sprite on the cropped map
-        box=(int(n_x - x_min), int(n_y - y_min))
-
-        if x_min <= n_x and x_max >= m_x and y_min <= n_y and y_max >= m_y:
-            # The tile's corners are in the snapshot bounds
-            # Half-represented tiles don't get overlays
-            if tile.owner != None:
-                nid = state.regions[tile.owner].owner
-                mask = overlay_sprites["hex_mask"]
-                snapshot.paste(
-                    im=state.nations[nid].color.to_rgb(),
-                    box=box,
-                    mask=mask
-                )
-            
-            # Allows for custom overlays in specific locations
-            if location in overlays.keys():
-                sprite = overlay_sprites[overlays[location]]
-                snapshot.paste(
-                    im=sprite,
-                    box=box,
-                    mask=sprite
-                )
-            
     return snapshot
 
-def snapshot_center(q, r, state: "GameState", overlays: dict = {}) -> Image.Image:
+def center_view(q, r, state: "GameState", overlays: dict = {}, 
+                zoom: int = 0) -> MapView:
+    """
+    Returns the view of the area q +- 5, r +- 1 around a hex. Each zoom level
+    out doubles the area, so the image stays about the same size.
+    """
+    span = 2 ** zoom
+    return map_view((q - 5 * span, r - span), (q + 5 * span, r + span), 
+                    state, overlays, zoom=zoom)
+
+def reach_view(units: list["Unit"], state: "GameState") -> MapView:
+    """
+    Returns the view of the area the units can move to this season, with
+    every reachable tile highlighted. See 
+    :func:`game.logic.pathfinding.reachable_by`.
+    """
+    reach = reachable_by(units, state)
+
+    q1 = min(q for q, r in reach) - 1
+    q2 = max(q for q, r in reach) + 1
+    # Rows slant by half a hex per column, so the corner rows are picked to
+    # keep every reachable hex inside the image
+    r1 = math.floor(min(r + (q - q1) / 2 for q, r in reach)) - 1
+    r2 = math.ceil(max(r + (q - q2) / 2 for q, r in reach)) + 1
+    return map_view((q1, r1), (q2, r2), state, highlights=reach)
+
+render_pool = ThreadPoolExecutor(max_workers=render_workers, 
+                                 thread_name_prefix="render")
+"""
+Renders snapshots off the event loop. PIL releases the GIL while cropping,
+pasting and encoding, so threads run renders in parallel without each
+needing its own copy of the source image, as processes would.
+"""
+
+def encode(view: MapView) -> io.BytesIO:
+    """
+    Renders a view and encodes it into an in-memory file, as set by
+    :data:`snapshot_format` and :data:`snapshot_options`.
+    """
+    image = render(view)
+    if snapshot_format == "jpeg":
+        # JPEG has no alpha channel
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format=snapshot_format, **snapshot_options)
+    buffer.seek(0)
+    return buffer
+
+snapshot_filename = f"snapshot.{snapshot_format.replace('jpeg', 'jpg')}"
+"""
+The file name to upload encoded snapshots under.
+"""
+
+async def encode_snapshot(view: MapView) -> io.BytesIO:
     """
-    Takes a single hex coordinate and takes a screenshot of the area q +- 5, 
-    r +- 1 around that hex
+    Renders and encodes a view in :data:`render_pool`, or reuses the last
+    encoding of the same image from :data:`snapshot_cache`. See 
+    :func:`encode`.
     """
-    return snapshot_corners((q-5, r-1), (q+5, r+1), state, overlays)
\ No newline at end of file
+    snapshot = snapshot_cache.get(view.key)
+    if snapshot is None:
+        loop = asyncio.get_running_loop()
+        buffer = await loop.run_in_executor(render_pool, encode, view)
+        snapshot = buffer.getvalue()
+        snapshot_cache.put(view.key, snapshot)
+    return io.BytesIO(snapshot)
@@ -1,15 +1,16 @@
 import asyncio
 import logging
-import shutil
 
 import game.logic.actions as actions
 import game.logic.combat as combat
 
 from world.load import load
-from world.database import init_db, get_db
+from world.database import init_db, close_db, get_db, barrier, copy_database
 from scripts.log import log_setup
 
 from world.world import get_state
+from game.data.constants import biomes
+from game.objs.terrain import Terrain
 
 log_setup("logs/test.log")
 logging.getLogger(__name__)
@@ -17,7 +18,7 @@ logging.getLogger(__name__)
 test_user = 247164420273209345
 
 async def test():
-    shutil.copy("data/map.db", "data/test.db")
+    copy_database("data/map.db", "data/test.db")
     await init_db("data/test.db")
     await load(get_state())
     
@@ -50,9 +51,44 @@ async def test():
     )
     
     # Make sure the new game state is save-load stable
-    await get_db().commit()
+    await barrier()
     await load(get_state())
-    shutil.copy("data/map.db", "data/test.db")
+    await close_db()
+    copy_database("data/map.db", "data/test.db")
     print("Test passed with no errors.")
-    
-asyncio.run(test())
\ No newline at end of file
+
+async def test_tile_queue():
+    copy_database("data/map.db", "data/test.db")
+    await init_db("data/test.db")
+    await load(get_state(), map_only=True)
+
+    # A tile saved before the grid grows must still be written as it was
+    # edited once the queue is flushed
+    tile = get_state().tiles[(-30, 30)]
+    tile.terrain.biome = "tundra"
+    await tile.save()
+    new_tile = get_state().tiles.add((-50, 10), Terrain("tundra", True, False, 1))
+    await new_tile.save()
+    await barrier()
+
+    async with get_db().execute(
+        "SELECT x, y, biome FROM tiles WHERE (x, y) IN ((-30, 30), (-50, 10))"
+    ) as cursor:
+        rows = {(row["x"], row["y"]): row["biome"] 
+                for row in await cursor.fetchall()}
+    assert rows == {(-30, 30): biomes.index("tundra"), 
+                    (-50, 10): biomes.index("tundra")}, rows
+
+    await close_db()
+    copy_database("data/map.db", "data/test.db")
+    print("Tile queue test passed with no errors.")
+
+async def main():
+    try:
+        await test()
+        await test_tile_queue()
+    finally:
+        # A failed test would otherwise leave the connection's thread running
+        await close_db()
+
+asyncio.run(main())
\ No newline at end of file
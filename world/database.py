@@ -1,11 +1,18 @@
 import aiosqlite
+import asyncio
 import json
 import logging
 import os
-import shutil
-from typing import Optional, TYPE_CHECKING
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, TYPE_CHECKING
 from pathlib import Path
 
+from game.data.constants import (write_batch_size, write_latency,
+                                 read_pool_size)
+from game.objs.terrain import Terrain
+
 if TYPE_CHECKING:
     from game.objs.nation import Nation
     from game.objs.economy import Econ
@@ -14,14 +21,57 @@ if TYPE_CHECKING:
     from game.objs.tile import Tile
     from game.objs.structure import Structure
     from game.objs.trade import Trade
+    from game.objs.clock import GameClock
 
 logger = logging.getLogger(__name__)
 
 _db: Optional[aiosqlite.Connection] = None
+_readers: Optional[asyncio.Queue] = None
+"""
+Idle read-only connections, see :func:`reading`.
+"""
+_reader_count = 0
+
+_WRITER_PRAGMAS = [
+    # Readers don't block the writer and the writer doesn't block readers
+    "PRAGMA journal_mode = WAL",
+    # Safe with WAL, commits only wait for the log to be written, not synced
+    "PRAGMA synchronous = NORMAL"
+]
+_PRAGMAS = [
+    # 16 MB page cache per connection
+    "PRAGMA cache_size = -16000",
+    # Read through a 256 MB memory map instead of read() calls
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY"
+]
+
+def copy_database(source: str | Path, destination: str | Path):
+    """
+    Copies one database into another through SQLite's backup API, replacing 
+    whatever the destination held. Unlike copying the file, this includes 
+    changes that are committed but still only in the source's write-ahead 
+    log, and the destination's own log can't replay stale pages over it.
+    
+    :param source: Path from the root to the database to copy.
+    :type source: str | Path
+    :param destination: Path from the root to the database to overwrite.
+    :type destination: str | Path
+    """
+    source_db = sqlite3.connect(source)
+    destination_db = sqlite3.connect(destination)
+    try:
+        source_db.backup(destination_db)
+    finally:
+        source_db.close()
+        destination_db.close()
 
 async def init_db(file: str = "data/nations.db"):
     """
-    Creates a new database connection.
+    Creates a new database connection for writing, and a pool of 
+    :data:`read_pool_size` read-only connections for loads (see 
+    :func:`reading`). The database runs in WAL mode, so reads never wait 
+    on writes or the other way round.
     
     :param file: Path from the root to the database file.
     :type file: str
@@ -39,10 +89,12 @@ async def init_db(file: str = "data/nations.db"):
             file_path.parent.mkdir(parents=True, exist_ok=True)
             file_path.write_text("")
         else:
-            shutil.copy("data/map.db", file)
+            copy_database(map_path, file_path)
     
     _db = await aiosqlite.connect(file)
     await _db.execute("PRAGMA foreign_keys = ON;")
+    for pragma in _WRITER_PRAGMAS + _PRAGMAS:
+        await _db.execute(pragma)
     _db.row_factory = aiosqlite.Row
 
     await _db.execute(
@@ -93,18 +145,20 @@ async def init_db(file: str = "data/nations.db"):
     """)
     logger.debug("Created units table")
 
+    await _db.execute(_CREATE_TILES)
+    logger.debug("Created tiles table")
+
     await _db.execute(
     """
-    CREATE TABLE IF NOT EXISTS tiles (
+    CREATE TABLE IF NOT EXISTS structures (
         x INTEGER NOT NULL,
         y INTEGER NOT NULL,
-        terrain TEXT NOT NULL,
-        owner INTEGER,
-        structure TEXT,
-        link_structures TEXT,
+        structure_type TEXT NOT NULL,
+        region INTEGER,
+        owner INTEGER NOT NULL,
         PRIMARY KEY (x, y))
     """)
-    logger.debug("Created tiles table")
+    logger.debug("Created structures table")
         
     await _db.execute(
         """
@@ -123,12 +177,133 @@ async def init_db(file: str = "data/nations.db"):
             resource TEXT)
         """)
 
+    await _db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS clock (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            tick INTEGER NOT NULL,
+            season INTEGER NOT NULL,
+            phase TEXT NOT NULL,
+            last_tick TEXT)
+        """)
+    logger.debug("Created clock table")
+
+    await _migrate_tiles()
+
     await _db.commit()
+    await _open_readers(file)
     logger.info("Database started")
 
+async def _open_readers(file: str):
+    global _readers, _reader_count
+    _readers = asyncio.Queue()
+    uri = Path(file).resolve().as_uri() + "?mode=ro"
+    for _ in range(read_pool_size):
+        reader = await aiosqlite.connect(uri, uri=True)
+        for pragma in _PRAGMAS:
+            await reader.execute(pragma)
+        reader.row_factory = aiosqlite.Row
+        _readers.put_nowait(reader)
+    _reader_count = read_pool_size
+    logger.debug(f"Opened {read_pool_size} read connections")
+
+@asynccontextmanager
+async def reading() -> AsyncIterator[aiosqlite.Connection]:
+    """
+    Borrows a read-only connection from the pool, waiting for one to be free
+    if they're all in use. Readers only see committed changes, so anything
+    that must see queued saves should call :func:`barrier` first.
+    """
+    if _readers is None:
+        raise RuntimeError("Database not initialized")
+    reader = await _readers.get()
+    try:
+        yield reader
+    finally:
+        _readers.put_nowait(reader)
+
+_CREATE_TILES = """
+    CREATE TABLE IF NOT EXISTS tiles (
+        x INTEGER NOT NULL,
+        y INTEGER NOT NULL,
+        biome INTEGER,
+        is_land INTEGER NOT NULL,
+        is_water INTEGER NOT NULL,
+        difficulty INTEGER NOT NULL,
+        straits INTEGER NOT NULL DEFAULT 0,
+        iron REAL NOT NULL DEFAULT 0,
+        copper REAL NOT NULL DEFAULT 0,
+        gold REAL NOT NULL DEFAULT 0,
+        coal REAL NOT NULL DEFAULT 0,
+        oil REAL NOT NULL DEFAULT 0,
+        owner INTEGER,
+        PRIMARY KEY (x, y))
+    """
+
+async def _migrate_tiles():
+    """
+    Converts a tiles table from the old layout, where terrain and structures
+    were stored as JSON text, to typed terrain columns and the structures 
+    table. Does nothing if the table is already converted.
+    """
+    async with _db.execute("PRAGMA table_info(tiles)") as cursor:
+        columns = [row["name"] for row in await cursor.fetchall()]
+    if "terrain" not in columns:
+        return
+    
+    logger.warning("Migrating tiles table to typed terrain columns")
+    await _db.execute("ALTER TABLE tiles RENAME TO legacy_tiles")
+    await _db.execute(_CREATE_TILES)
+
+    async with _db.execute("SELECT * FROM legacy_tiles") as cursor:
+        rows = await cursor.fetchall()
+    # Old structures name their region, the structures table holds its ID
+    async with _db.execute("SELECT id, name FROM regions") as cursor:
+        region_ids = {row["name"]: row["id"] for row in await cursor.fetchall()}
+    
+    tiles = []
+    structures = []
+    for row in rows:
+        terrain = Terrain(*json.loads(row["terrain"]))
+        tiles.append((row["x"], row["y"], *terrain.encode(), row["owner"]))
+        
+        if row["structure"] not in (None, "{}"):
+            structure = json.loads(row["structure"])
+            region = structure["region"]
+            if isinstance(region, str):
+                region = region_ids.get(region)
+                if region is None:
+                    logger.warning(f"Structure at {(row['x'], row['y'])} "
+                                   f"names unknown region "
+                                   f"'{structure['region']}', migrating it "
+                                   f"without a region")
+            structures.append((
+                structure["x"], 
+                structure["y"], 
+                structure["structure_type"],
+                region, 
+                structure["owner"]
+            ))
+
+    await _db.executemany(_UPSERT_TILE, tiles)
+    await _db.executemany(_UPSERT_STRUCTURE, structures)
+    await _db.execute("DROP TABLE legacy_tiles")
+    logger.info(f"Migrated {len(tiles)} tiles and {len(structures)} structures")
+
 async def close_db():
-    global _db
+    """
+    Stops the background writer, writes and commits everything still
+    waiting, and closes the connection.
+    """
+    global _db, _readers
     if _db is not None:
+        await stop_writer()
+        await barrier()
+        # Waits for borrowed readers to come back
+        for _ in range(_reader_count):
+            reader = await _readers.get()
+            await reader.close()
+        _readers = None
         await _db.close()
         _db = None
 
@@ -139,33 +314,273 @@ def get_db() -> aiosqlite.Connection:
 
 # ---------------
 
+_dirty: dict[str, dict[int, object]] = {
+    "Nation": {},
+    "Region": {},
+    "Unit": {},
+    "Tile": {},
+    "Econ": {},
+    "Trade": {},
+    "GameClock": {},
+}
+"""
+Objects waiting to be written by :func:`barrier`, grouped by class name and
+keyed by :func:`_row_key` so that repeated changes only write once. Tiles 
+are queued as their grid, see :func:`_queue`.
+"""
+
+_write_lock = asyncio.Lock()
+"""
+Held while writing, so that a batch's transaction never includes writes it
+didn't make.
+"""
+_pending_since: float | None = None
+"""
+When the oldest change that hasn't been committed yet was made, or None if
+everything is committed.
+"""
+_pending: asyncio.Event | None = None
+_full: asyncio.Event | None = None
+_writer: asyncio.Task | None = None
+
+def _row_key(obj: "Nation | Region | Unit | Tile | Econ | Trade") -> object:
+    if type(obj).__name__ == "Tile":
+        # Tiles are views made on demand, so many can stand for one row
+        return obj.location
+    return id(obj)
+
+def _queue(obj: "Nation | Region | Unit | Tile | Econ | Trade", 
+           replace: bool = True):
+    """
+    Adds an object to :data:`_dirty`, replacing any earlier change to the 
+    same row unless ``replace`` is False. A tile is queued as its grid under
+    its location, and looked up again when it's written, rather than 
+    holding on to the view it was saved through.
+    """
+    value = obj.grid if type(obj).__name__ == "Tile" else obj
+    objs = _dirty[type(obj).__name__]
+    if replace:
+        objs[_row_key(obj)] = value
+    else:
+        objs.setdefault(_row_key(obj), value)
+
+def _dirty_count() -> int:
+    return sum(len(objs) for objs in _dirty.values())
+
+def _note_pending():
+    """
+    Wakes the background writer for a new change, and tells it to write right
+    away once :data:`write_batch_size` objects are waiting.
+    """
+    global _pending_since
+    if _pending_since is None:
+        _pending_since = time.monotonic()
+    if _writer is None:
+        return
+    _pending.set()
+    if _dirty_count() >= write_batch_size:
+        _full.set()
+
+def mark_dirty(obj: "Nation | Region | Unit | Tile | Econ | Trade"):
+    """
+    Records that a game object has changed and should be written on the next
+    :func:`barrier`, or by the background writer. Nothing is written until 
+    then.
+    """
+    _queue(obj)
+    _note_pending()
+
+async def save(obj: "Nation | Region | Unit | Tile | Econ | Trade"):
+    """
+    Queues a game object to be written by the background writer (see 
+    :func:`start_writer`) and returns without waiting for the database. 
+    Regions, units and trades that have never been saved are inserted right
+    away instead, since their IDs come from the database, but are still only
+    committed with the next batch.
+    """
+    insert = _inserts.get(type(obj).__name__)
+    if insert is not None and obj.id is None:
+        async with _write_lock:
+            await insert(obj)
+        _note_pending()
+    else:
+        mark_dirty(obj)
+
+async def barrier():
+    """
+    Writes and commits everything that's waiting, and returns once it's 
+    durable. Ticks and shutdown wait on this so that nothing they changed 
+    can be lost.
+    """
+    global _pending_since
+    async with _write_lock:
+        await _flush()
+        await get_db().commit()
+        if _pending_since is not None:
+            logger.debug(f"Committed changes after "
+                         f"{time.monotonic() - _pending_since:.2f}s")
+        _pending_since = None
+        if _full is not None:
+            _full.clear()
+
+async def _write_behind():
+    """
+    Commits waiting changes in groups, either :data:`write_latency` seconds 
+    after the first change or as soon as :data:`write_batch_size` objects are
+    waiting, whichever comes first.
+    """
+    while True:
+        await _pending.wait()
+        _pending.clear()
+        try:
+            await asyncio.wait_for(_full.wait(), timeout=write_latency)
+        except asyncio.TimeoutError:
+            pass
+        
+        try:
+            await barrier()
+        except Exception as e:
+            # The batch stays dirty, so it's retried after the next wait
+            logger.error(f"Background write failed: {e}")
+            _pending.set()
+
+def start_writer():
+    """
+    Starts committing changes in the background. Does nothing if it's 
+    already running.
+    """
+    global _writer, _pending, _full
+    if _writer is None or _writer.done():
+        _pending = asyncio.Event()
+        _full = asyncio.Event()
+        _writer = asyncio.create_task(_write_behind())
+        if _pending_since is not None:
+            _pending.set()
+
+async def stop_writer():
+    """
+    Stops the background writer. Anything still waiting is left for 
+    :func:`barrier`.
+    """
+    global _writer
+    if _writer is not None:
+        _writer.cancel()
+        try:
+            await _writer
+        except asyncio.CancelledError:
+            pass
+        _writer = None
+
+async def _flush():
+    """
+    Writes every dirty object. Updates are batched into one ``executemany``
+    per table. New regions, units and trades still insert one at a time, 
+    since their IDs come from the database.
+
+    If any write fails, the whole batch is rolled back and stays dirty. The
+    batch is written in a savepoint, which commits when it's released unless
+    a transaction was already open, so only call this through 
+    :func:`barrier`.
+    """
+    batch = {name: list(objs.values()) for name, objs in _dirty.items()}
+    # Tiles deleted since they were queued have nothing left to write
+    batch["Tile"] = [grid[location] for location, grid in _dirty["Tile"].items()
+                     if location in grid]
+    for objs in _dirty.values():
+        objs.clear()
+    if not any(batch.values()):
+        return
+
+    logger.debug("Flushing " + ", ".join(
+        f"{len(objs)} {name}" for name, objs in batch.items() if objs
+    ))
+    db = get_db()
+    inserted = []
+    updates = dict(batch)
+    await db.execute("SAVEPOINT flush")
+    try:
+        for save, name in ((save_region, "Region"), (save_unit, "Unit"), 
+                           (save_trade, "Trade")):
+            updates[name] = []
+            for obj in batch[name]:
+                if obj.id is None:
+                    await save(obj)
+                    inserted.append(obj)
+                else:
+                    updates[name].append(obj)
+
+        await db.executemany(
+            _UPSERT_NATION, [_nation_params(obj) for obj in updates["Nation"]])
+        await db.executemany(
+            _UPSERT_ECONOMY, [_economy_params(obj) for obj in updates["Econ"]])
+        await _save_tiles(updates["Tile"])
+        await db.executemany(
+            _UPDATE_REGION, [_region_params(obj) for obj in updates["Region"]])
+        await db.executemany(
+            _UPDATE_UNIT, [_unit_params(obj) for obj in updates["Unit"]])
+        await db.executemany(
+            _UPDATE_TRADE, [_trade_params(obj) for obj in updates["Trade"]])
+        await db.executemany(
+            _UPSERT_CLOCK, [_clock_params(obj) for obj in updates["GameClock"]])
+        await db.execute("RELEASE flush")
+    except Exception:
+        await db.execute("ROLLBACK TO flush")
+        await db.execute("RELEASE flush")
+        # The inserts were rolled back too, so their IDs are no longer valid
+        for obj in inserted:
+            obj.id = None
+        for name, objs in batch.items():
+            for obj in objs:
+                _queue(obj, replace=False)
+        raise
+
+# ---------------
+
+_UPSERT_NATION = """
+    INSERT INTO nations (id, name, dossier, color, allies)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        name = excluded.name,
+        dossier = excluded.dossier,
+        color = excluded.color,
+        allies = excluded.allies
+    """
+
+def _nation_params(nation: "Nation") -> tuple:
+    return (
+        nation.userid, 
+        nation.name, 
+        json.dumps(nation.dossier), 
+        int(nation.color),
+        json.dumps(nation.allies)
+    )
+
 async def save_nation(nation: "Nation"):
     logger.debug(f"Saving nation at {nation.userid}")
-    await get_db().execute(
-        """
-        INSERT INTO nations (id, name, dossier, color, allies)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-            name = excluded.name,
-            dossier = excluded.dossier,
-            color = excluded.color,
-            allies = excluded.allies
-        """,
-        (
-            nation.userid, 
-            nation.name, 
-            json.dumps(nation.dossier), 
-            int(nation.color),
-            json.dumps(nation.allies)
-        )
-    )
+    await get_db().execute(_UPSERT_NATION, _nation_params(nation))
 
 async def load_nations_rows():
-    async with get_db().execute("SELECT * FROM nations") as cursor:
-        return await cursor.fetchall()
+    async with reading() as reader:
+        async with reader.execute("SELECT * FROM nations") as cursor:
+            return await cursor.fetchall()
 
 # ---------------
 
+_UPDATE_REGION = """
+    UPDATE regions
+    SET tiles = ?, city_tier = ?, industries = ?, population = ?
+    WHERE id = ?
+    """
+
+def _region_params(region: "Region") -> tuple:
+    return (
+        json.dumps(region.tiles),
+        region.city_tier,
+        json.dumps([industry.name for industry in region.industries]),
+        region.population,
+        region.id
+    )
+
 async def save_region(region: "Region"):
     logger.debug(f"Saving region at {region.name}")
     if region.id == None:
@@ -192,27 +607,39 @@ async def save_region(region: "Region"):
         ) as cursor:
             region.id = cursor.lastrowid
     else:
-        await get_db().execute(
-            """
-            UPDATE regions
-            SET tiles = ?, city_tier = ?, industries = ?, population = ?
-            WHERE id = ?
-            """,
-            (
-                json.dumps(region.tiles),
-                region.city_tier,
-                json.dumps([industry.name for industry in region.industries]),
-                region.population,
-                region.id
-            )
-        )
+        await get_db().execute(_UPDATE_REGION, _region_params(region))
 
 async def load_regions_rows():
-    async with get_db().execute("SELECT * FROM regions") as cursor:
-        return await cursor.fetchall()
+    async with reading() as reader:
+        async with reader.execute("SELECT * FROM regions") as cursor:
+            return await cursor.fetchall()
     
 # ---------------
 
+_UPDATE_UNIT = """
+    UPDATE units
+    SET name = ?, type = ?, home = ?, x = ?, y = ?,
+        strength = ?, morale = ?, exp = ?, owner = ?,
+        movement_free = ?, status = ?
+    WHERE id = ?
+    """
+
+def _unit_params(unit: "Unit") -> tuple:
+    return (
+        unit.name,
+        unit.type,
+        unit.home,
+        unit.location[0],
+        unit.location[1],
+        unit.strength,
+        unit.morale,
+        unit.exp,
+        unit.owner,
+        unit.movement_free,
+        unit.status,
+        unit.id,
+    )
+
 async def save_unit(unit: "Unit"):
     logger.debug(f"Saving unit at {unit.id}")
     if unit.id is None:
@@ -241,100 +668,152 @@ async def save_unit(unit: "Unit"):
         ) as cursor:
             unit.id = cursor.lastrowid
     else:
-        await get_db().execute(
-            """
-            UPDATE units
-            SET name = ?, type = ?, home = ?, x = ?, y = ?,
-                strength = ?, morale = ?, exp = ?, owner = ?,
-                movement_free = ?, status = ?
-            WHERE id = ?
-            """,
-            (
-                unit.name,
-                unit.type,
-                unit.home,
-                unit.location[0],
-                unit.location[1],
-                unit.strength,
-                unit.morale,
-                unit.exp,
-                unit.owner,
-                unit.movement_free,
-                unit.status,
-                unit.id,
-            )
-        )
+        await get_db().execute(_UPDATE_UNIT, _unit_params(unit))
 
 async def delete_unit(unit: "Unit"):
+    """
+    Deletes a unit's row. Use :func:`game.logic.actions.disband_unit` to 
+    also remove it from the game.
+    """
+    _dirty["Unit"].pop(_row_key(unit), None)
     if unit.id is not None:
-        await get_db().execute("DELETE FROM units WHERE id = ?", (unit.id,))
+        async with _write_lock:
+            await get_db().execute("DELETE FROM units WHERE id = ?", 
+                                   (unit.id,))
+        _note_pending()
 
 async def load_units_rows():
-    async with get_db().execute("SELECT * FROM units") as cursor:
-        return await cursor.fetchall()
+    async with reading() as reader:
+        async with reader.execute("SELECT * FROM units") as cursor:
+            return await cursor.fetchall()
 
 # ---------------
 
-def encode_structure(structure: "Structure") -> dict:
-    if structure is None:
-        return {}
-    
-    return {
-        "structure_type": structure.structure_type.name,
-        "x": structure.location[0],
-        "y": structure.location[1],
-        "region": structure.region,
-        "owner": structure.owner
-    }
+_UPSERT_TILE = """
+    INSERT INTO tiles (
+        x, y, biome, is_land, is_water, difficulty, straits, 
+        iron, copper, gold, coal, oil, owner)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(x, y) DO UPDATE SET
+        biome = excluded.biome,
+        is_land = excluded.is_land,
+        is_water = excluded.is_water,
+        difficulty = excluded.difficulty,
+        straits = excluded.straits,
+        iron = excluded.iron,
+        copper = excluded.copper,
+        gold = excluded.gold,
+        coal = excluded.coal,
+        oil = excluded.oil,
+        owner = excluded.owner
+    """
 
-async def save_tile(tile: "Tile"):
-    logger.debug(f"Saving tile at {tile.location}")
+_UPSERT_STRUCTURE = """
+    INSERT INTO structures (x, y, structure_type, region, owner)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(x, y) DO UPDATE SET
+        structure_type = excluded.structure_type,
+        region = excluded.region,
+        owner = excluded.owner
+    """
+
+def _tile_params(tile: "Tile") -> tuple:
     x, y = tile.location
-    await get_db().execute(
-        """
-        INSERT INTO tiles (
-        x, y, terrain, owner, structure)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(x, y) DO UPDATE SET
-            terrain = excluded.terrain,
-            owner = excluded.owner,
-            structure = excluded.structure
-        """,
-        (
-            x, y, tile.terrain.data(), tile.owner,  
-            json.dumps(encode_structure(tile.structure))
-        )
+    return (x, y, *tile.terrain.encode(), tile.owner)
+
+def _structure_params(structure: "Structure") -> tuple:
+    return (
+        structure.location[0],
+        structure.location[1],
+        structure.structure_type.name,
+        structure.region,
+        structure.owner
     )
 
+async def _save_tiles(tiles: list["Tile"]):
+    """
+    Writes a batch of tiles along with their structures.
+    """
+    db = get_db()
+    await db.executemany(_UPSERT_TILE, [_tile_params(tile) for tile in tiles])
+    await db.executemany(
+        _UPSERT_STRUCTURE, 
+        [_structure_params(tile.structure) for tile in tiles 
+         if tile.structure is not None]
+    )
+    await db.executemany(
+        "DELETE FROM structures WHERE x = ? AND y = ?",
+        [tile.location for tile in tiles if tile.structure is None]
+    )
+
+async def save_tile(tile: "Tile"):
+    logger.debug(f"Saving tile at {tile.location}")
+    await _save_tiles([tile])
+
 async def save_tiles(iterable_tiles):
-    for tile in iterable_tiles:
-        await save_tile(tile)
+    await _save_tiles(list(iterable_tiles))
+
+async def delete_tile(location: tuple[int, int]):
+    """
+    Deletes a tile's row, dropping any change to it that's still waiting to
+    be written. Only committed with the next batch, like any other write.
+    """
+    _dirty["Tile"].pop(tuple(location), None)
+    async with _write_lock:
+        await get_db().execute("DELETE FROM tiles WHERE x = ? AND y = ?", 
+                               tuple(location))
+    _note_pending()
 
 async def load_tiles_rows():
-    async with get_db().execute("SELECT * FROM tiles") as cursor:
-        return await cursor.fetchall()
+    async with reading() as reader:
+        async with reader.execute("SELECT * FROM tiles") as cursor:
+            return await cursor.fetchall()
+
+async def load_tile_owners_rows():
+    async with reading() as reader:
+        async with reader.execute(
+            "SELECT x, y, owner FROM tiles WHERE owner IS NOT NULL"
+        ) as cursor:
+            return await cursor.fetchall()
+
+async def load_structures_rows():
+    async with reading() as reader:
+        async with reader.execute("SELECT * FROM structures") as cursor:
+            return await cursor.fetchall()
 
 # ---------------
 
+_UPSERT_ECONOMY = """
+    INSERT INTO economies (nationid, influence, influence_cap)
+    VALUES (?, ?, ?)
+    ON CONFLICT(nationid) DO UPDATE SET
+        influence = excluded.influence,
+        influence_cap = excluded.influence_cap
+    """
+
+def _economy_params(econ: "Econ") -> tuple:
+    return (econ.nationid, econ.influence, econ.influence_cap)
+
 async def save_economy(econ: "Econ"):
     logger.debug(f"Saving economy at {econ.nationid}")
-    await get_db().execute(
-        """
-        INSERT INTO economies (nationid, influence, influence_cap)
-        VALUES (?, ?, ?)
-        ON CONFLICT(nationid) DO UPDATE SET
-            influence = excluded.influence,
-            influence_cap = excluded.influence_cap
-        """,
-        (econ.nationid, econ.influence, econ.influence_cap)
-    )
+    await get_db().execute(_UPSERT_ECONOMY, _economy_params(econ))
 
 async def load_economies_rows():
-    async with get_db().execute("SELECT * FROM economies") as cursor:
-        return await cursor.fetchall()
+    async with reading() as reader:
+        async with reader.execute("SELECT * FROM economies") as cursor:
+            return await cursor.fetchall()
 
 # ---------------
 
+_UPDATE_TRADE = """
+    UPDATE trades
+    SET nations = ?, resource = ?
+    WHERE id = ?
+    """
+
+def _trade_params(trade: "Trade") -> tuple:
+    return (json.dumps(trade.nations), trade.resource, trade.id)
+
 async def save_trade(trade: "Trade"):
     logger.debug(f"Saving trade between {trade.nations[0] and {trade.nations[1]}}")
     if trade.id is None:
@@ -347,15 +826,45 @@ async def save_trade(trade: "Trade"):
         ) as cursor:
             trade.id = cursor.lastrowid
     else:
-        await get_db().execute(
-            """
-            UPDATE trades
-            SET nations = ?, resource = ?
-            WHERE id = ?
-            """,
-            (json.dumps(trade.nations), trade.resource, trade.id)
-        )
+        await get_db().execute(_UPDATE_TRADE, _trade_params(trade))
 
 async def load_trades_rows():
-    async with get_db().execute("SELECT * FROM trades") as cursor:
-        return await cursor.fetchall()
\ No newline at end of file
+    async with reading() as reader:
+        async with reader.execute("SELECT * FROM trades") as cursor:
+            return await cursor.fetchall()
+
+# ---------------
+
+_UPSERT_CLOCK = """
+    INSERT INTO clock (id, tick, season, phase, last_tick)
+    VALUES (1, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        tick = excluded.tick,
+        season = excluded.season,
+        phase = excluded.phase,
+        last_tick = excluded.last_tick
+    """
+
+def _clock_params(clock: "GameClock") -> tuple:
+    return (
+        clock.tick,
+        clock.season,
+        clock.phase,
+        clock.last_tick.isoformat() if clock.last_tick is not None else None
+    )
+
+async def load_clock_row():
+    async with reading() as reader:
+        async with reader.execute("SELECT * FROM clock") as cursor:
+            return await cursor.fetchone()
+
+# ---------------
+
+_inserts = {
+    "Region": save_region,
+    "Unit": save_unit,
+    "Trade": save_trade
+}
+"""
+The save functions of the objects that get their IDs from the database.
+"""
@@ -0,0 +1,401 @@
+import logging
+from array import array
+from collections.abc import Iterable, Iterator, MutableMapping
+from typing import TYPE_CHECKING
+
+from game.data.constants import ore_types
+from game.objs.terrain import LAND, WATER
+from game.objs.tile import Tile
+
+if TYPE_CHECKING:
+    from game.objs.structure import Structure
+    from game.objs.terrain import Terrain
+
+logger = logging.getLogger(__name__)
+
+EXISTS = 4
+"""
+Set in :attr:`TileGrid.flags` for every cell that holds a tile. Cells 
+without this flag held a tile that has since been deleted.
+"""
+NO_OWNER = -1
+NO_CELL = -1
+COASTAL = LAND | WATER
+"""
+A tile is coastal if both its land and water bits are set in
+:attr:`TileGrid.flags`, so the flags array doubles as the coastal bitset.
+"""
+
+DIRECTIONS = [("ne", (1, -1)), ("n", (0, -1)), ("nw", (-1, 0)), 
+              ("sw", (-1, 1)), ("s", (0, 1)), ("se", (1, 0))]
+"""
+The six neighbor directions as (q, r) offsets. Listed counterclockwise from
+NE, the same order that strait sides are numbered in.
+"""
+SLOTS = {name: slot for slot, (name, offset) in enumerate(DIRECTIONS)}
+
+def offset_row(q: int, r: int) -> int:
+    """
+    Converts axial coordinates to the row of the tile in the rectangular
+    (offset) layout of the map image.
+    """
+    return r + (q >> 1)
+
+class TileGrid(MutableMapping):
+    """
+    Stores every tile of the map in parallel arrays, one entry per cell. A
+    tile gets a cell the first time it's added, at the end of the arrays, 
+    and keeps it for as long as the grid exists, so cell indices never 
+    change. Locations are found through a slot table covering the map's 
+    bounding rectangle, indexed column by column, where columns are q 
+    coordinates and rows are offset rows (see :func:`offset_row`). Only 
+    the slot table is laid out again when the map grows.
+
+    Behaves like a ``dict[tuple[int, int], Tile]`` keyed by (q, r) location.
+    The :class:`Tile` objects it returns are views into the arrays, so they
+    are cheap to create, and stay valid however the grid grows.
+    """
+    def __init__(self):
+        self.q_min = 0
+        self.row_min = 0
+        self.width = 0
+        self.height = 0
+        self._count = 0
+        self._slots = array("i")
+        """
+        The cell index of every location in the bounding rectangle, or
+        :data:`NO_CELL` if it never had a tile.
+        """
+        self.biome = array("b")
+        self.flags = array("B")
+        self.difficulty = array("B")
+        self.straits = array("B")
+        self.ores = {ore: array("d") for ore in ore_types}
+        self.owner = array("i")
+        self._q = array("i")
+        self._r = array("i")
+        self.structures: dict[int, "Structure"] = {}
+        """
+        The structures on the map, keyed by cell index.
+        """
+        self._neighbors = None
+        self._metro: dict[int, tuple[int, ...]] = {}
+        self._borders: dict[int, dict[int, int]] | None = None
+        self.owner_version = 0
+        """
+        Counts changes to tile owners, so that anything drawn from them knows
+        when to redraw.
+        """
+
+    # ----- Indexing ----- #
+
+    def index(self, location: tuple[int, int]) -> int | None:
+        """
+        Returns the cell index of the tile at the given location, or None if
+        there is no tile there.
+        """
+        index = self._cell(location)
+        if index is not None and self.flags[index] & EXISTS:
+            return index
+        return None
+
+    def location(self, index: int) -> tuple[int, int]:
+        """
+        Returns the (q, r) location of the cell at the given index.
+        """
+        return (self._q[index], self._r[index])
+
+    def indices(self) -> Iterator[int]:
+        """
+        Iterates over the indices of every cell that holds a tile.
+        """
+        for index, flags in enumerate(self.flags):
+            if flags & EXISTS:
+                yield index
+
+    def reserve(self, locations: Iterable[tuple[int, int]]):
+        """
+        Grows the slot table so that it covers all of the given locations. 
+        Cells don't move, so tiles keep their indices.
+        """
+        locations = list(locations)
+        if not locations:
+            return
+
+        columns = [q for q, r in locations]
+        rows = [offset_row(q, r) for q, r in locations]
+        q_min, q_max = min(columns), max(columns)
+        row_min, row_max = min(rows), max(rows)
+        if self.width > 0:
+            q_min = min(q_min, self.q_min)
+            q_max = max(q_max, self.q_min + self.width - 1)
+            row_min = min(row_min, self.row_min)
+            row_max = max(row_max, self.row_min + self.height - 1)
+
+            if (q_min == self.q_min and row_min == self.row_min
+                and q_max - q_min + 1 == self.width
+                and row_max - row_min + 1 == self.height):
+                return
+
+        old = (self._slots, self.q_min, self.row_min, self.width, self.height)
+        self.q_min = q_min
+        self.row_min = row_min
+        self.width = q_max - q_min + 1
+        self.height = row_max - row_min + 1
+        self._slots = array("i", [NO_CELL]) * (self.width * self.height)
+        logger.debug(f"Resized tile grid to {self.width}x{self.height}")
+
+        slots, old_q_min, old_row_min, old_width, old_height = old
+        for column in range(old_width):
+            start = column * old_height
+            new_start = self._slot(column + old_q_min, old_row_min)
+            self._slots[new_start:new_start + old_height] = (
+                slots[start:start + old_height]
+            )
+
+    def _slot(self, q: int, row: int) -> int | None:
+        """
+        Returns the position of a column and offset row in the slot table,
+        or None if it's outside the grid's bounds.
+        """
+        column = q - self.q_min
+        row = row - self.row_min
+        if 0 <= column < self.width and 0 <= row < self.height:
+            return column * self.height + row
+        return None
+
+    def _cell(self, location: tuple[int, int]) -> int | None:
+        """
+        Returns the index of the cell for a location, whether or not there's
+        a tile there now, or None if there never was one.
+        """
+        q, r = location
+        slot = self._slot(q, offset_row(q, r))
+        if slot is None:
+            return None
+        index = self._slots[slot]
+        return index if index != NO_CELL else None
+
+    def _new_cell(self, location: tuple[int, int]) -> int:
+        """
+        Appends an empty cell for a location, growing the slot table if
+        needed, and returns its index.
+        """
+        self.reserve([location])
+        q, r = location
+        index = len(self.flags)
+        self._slots[self._slot(q, offset_row(q, r))] = index
+        self.biome.append(0)
+        self.flags.append(0)
+        self.difficulty.append(0)
+        self.straits.append(0)
+        for ore in ore_types:
+            self.ores[ore].append(0.0)
+        self.owner.append(NO_OWNER)
+        self._q.append(q)
+        self._r.append(r)
+        return index
+
+    # ----- Neighbors ----- #
+
+    def build_neighbors(self):
+        """
+        Builds the neighbor table, which has one slot per direction in 
+        :data:`DIRECTIONS` for every cell, holding the index of the neighbor 
+        in that direction or -1 if there isn't one. This is done once after 
+        loading, and again only if tiles are added or removed.
+        """
+        neighbors = array("i", [-1]) * (6 * len(self.flags))
+        for index in self.indices():
+            q, r = self.location(index)
+            for slot, (name, (dq, dr)) in enumerate(DIRECTIONS):
+                neighbor = self.index((q + dq, r + dr))
+                if neighbor is not None:
+                    neighbors[6 * index + slot] = neighbor
+        self._neighbors = neighbors
+        self._metro.clear()
+        logger.debug(f"Built neighbor table for {self._count} tiles")
+
+    def _invalidate_neighbors(self):
+        self._neighbors = None
+        self._metro.clear()
+
+    def neighbor(self, index: int, direction: str) -> int | None:
+        """
+        Returns the index of the neighbor of a cell in the named direction, 
+        or None if there is no tile there.
+        """
+        if self._neighbors is None:
+            self.build_neighbors()
+        neighbor = self._neighbors[6 * index + SLOTS[direction]]
+        return neighbor if neighbor >= 0 else None
+
+    def area(self, index: int) -> tuple[int, ...]:
+        """
+        Returns the indices of a cell and each of its neighbors.
+        """
+        if self._neighbors is None:
+            self.build_neighbors()
+        start = 6 * index
+        return (index, *(neighbor for neighbor in self._neighbors[start:start + 6]
+                         if neighbor >= 0))
+
+    def metro(self, index: int) -> tuple[int, ...]:
+        """
+        Returns the indices of every cell within two tiles of a cell, 
+        including itself. Results are cached until the neighbor table is 
+        rebuilt.
+        """
+        metro = self._metro.get(index)
+        if metro is None:
+            cells = {}
+            for area_index in self.area(index):
+                cells.update(dict.fromkeys(self.area(area_index)))
+            metro = self._metro[index] = tuple(cells)
+        return metro
+
+    # ----- Borders ----- #
+
+    def build_borders(self):
+        """
+        Counts, for every owner, how many pairs of neighboring tiles it shares
+        with each other owner. Once built, the counts are kept up to date as
+        owners change, and only rebuilt if tiles are added or removed.
+        """
+        borders = {}
+        for index in self.indices():
+            owner = self.owner[index]
+            if owner == NO_OWNER:
+                continue
+            for neighbor in self.area(index)[1:]:
+                other = self.owner[neighbor]
+                if other == NO_OWNER or other == owner:
+                    continue
+                counts = borders.setdefault(owner, {})
+                counts[other] = counts.get(other, 0) + 1
+        self._borders = borders
+        logger.debug(f"Built border counts for {len(borders)} owners")
+
+    def _count_border(self, owner: int, other: int, change: int):
+        for a, b in ((owner, other), (other, owner)):
+            counts = self._borders.setdefault(a, {})
+            count = counts.get(b, 0) + change
+            if count > 0:
+                counts[b] = count
+            else:
+                counts.pop(b, None)
+                if not counts:
+                    del self._borders[a]
+
+    def bordering(self, owner: int) -> set[int]:
+        """
+        Returns the owners of every tile that neighbors a tile of the given
+        owner, other than itself.
+        """
+        if self._borders is None:
+            self.build_borders()
+        return set(self._borders.get(owner, ()))
+
+    # ----- Cell data ----- #
+
+    def put(self, location: tuple[int, int], biome: int | None,
+            is_land: int, is_water: int, difficulty: int, straits: int,
+            *ores: float, owner: int | None = None) -> int:
+        """
+        Writes a tile from the encoded values produced by
+        :meth:`Terrain.encode`, growing the grid if needed. Returns the
+        tile's index.
+        """
+        index = self._cell(location)
+        if index is None:
+            index = self._new_cell(location)
+        if not self.flags[index] & EXISTS:
+            self._count += 1
+            self._invalidate_neighbors()
+            self._borders = None
+
+        self.biome[index] = biome if biome is not None else -1
+        self.flags[index] = (EXISTS | (LAND if is_land else 0)
+                             | (WATER if is_water else 0))
+        self.difficulty[index] = difficulty
+        self.straits[index] = straits
+        for ore, richness in zip(ore_types, ores):
+            self.ores[ore][index] = richness
+        self.set_owner(index, owner)
+        return index
+
+    def add(self, location: tuple[int, int], terrain: "Terrain",
+            owner: int | None = None) -> Tile:
+        """
+        Creates or replaces the tile at a location and returns it.
+        """
+        return Tile(self, self.put(location, *terrain.encode(), owner=owner))
+
+    def set_terrain(self, index: int, terrain: "Terrain"):
+        self.put(self.location(index), *terrain.encode(),
+                 owner=self.get_owner(index))
+
+    def is_coastal(self, index: int) -> bool:
+        return self.flags[index] & COASTAL == COASTAL
+
+    def get_owner(self, index: int) -> int | None:
+        owner = self.owner[index]
+        return owner if owner != NO_OWNER else None
+
+    def set_owner(self, index: int, owner: int | None):
+        owner = owner if owner is not None else NO_OWNER
+        old = self.owner[index]
+        if self._borders is not None and old != owner:
+            for neighbor in self.area(index)[1:]:
+                other = self.owner[neighbor]
+                if other == NO_OWNER:
+                    continue
+                if old != NO_OWNER and other != old:
+                    self._count_border(old, other, -1)
+                if owner != NO_OWNER and other != owner:
+                    self._count_border(owner, other, 1)
+        if old != owner:
+            self.owner_version += 1
+        self.owner[index] = owner
+
+    # ----- Mapping interface ----- #
+
+    def __getitem__(self, location: tuple[int, int]) -> Tile:
+        index = self.index(location)
+        if index is None:
+            raise KeyError(location)
+        return Tile(self, index)
+
+    def __setitem__(self, location: tuple[int, int], tile: Tile):
+        index = self.put(location, *tile.terrain.encode(), owner=tile.owner)
+        if tile.structure is not None:
+            self.structures[index] = tile.structure
+
+    def __delitem__(self, location: tuple[int, int]):
+        index = self.index(location)
+        if index is None:
+            raise KeyError(location)
+        self.flags[index] = 0
+        if self.owner[index] != NO_OWNER:
+            self.owner_version += 1
+        self.owner[index] = NO_OWNER
+        self.structures.pop(index, None)
+        self._count -= 1
+        self._invalidate_neighbors()
+        self._borders = None
+
+    def __contains__(self, location) -> bool:
+        return self.index(location) is not None
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        for index in self.indices():
+            yield self.location(index)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self):
+        self.__init__()
+
+    def __repr__(self) -> str:
+        return f"TileGrid({self._count} tiles, {self.width}x{self.height})"
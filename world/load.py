@@ -1,10 +1,12 @@
 import json
 import logging
+from datetime import date, datetime, timezone
 from discord import Color
 from typing import TYPE_CHECKING
 
 import world.database as db
 
+from game.data.constants import ore_types, set_season
 from game.data.structures import structure_types
 from game.data.industries import industry_types
 from game.objs.unit import Unit
@@ -12,10 +14,11 @@ from game.objs.nation import Nation
 from game.objs.region import Region
 from game.objs.economy import Econ
 from game.objs.trade import Trade
-from game.objs.tile import Tile
-from game.objs.terrain import Terrain
+from game.objs.clock import GameClock
 from game.objs.structure import Structure
 from game.logic.logistics import build_markets
+from world.grid import TileGrid
+from world.mapfile import MAP_SOURCE, compile_map, open_map
 
 if TYPE_CHECKING:
     from world.world import GameState
@@ -29,29 +32,69 @@ async def load(state: "GameState", map_only: bool = False):
     :param map_only: Whether to only load the tile data from the database. Will ignore all other game data.
     :type map_only: bool
     """
+    # Saves are queued and loads read through separate connections, so commit
+    # them first to read them back
+    await db.barrier()
+
     logger.warning("Clearing nation data")
     state.nations.clear()
     state.units.clear()
+    state.unit_ids.clear()
+    state.unit_locations.clear()
+    state.port_regions.clear()
     
     logger.info("Starting game data load...")
-    tiles_data = await db.load_tiles_rows()
-    for row in tiles_data:
-        tile = Tile(
-            terrain=Terrain(*json.loads(row["terrain"])),
+    tiles = TileGrid()
+    # The editor changes terrain, so it always reads it from the database
+    map_file = None if map_only else open_map()
+    if map_file is not None:
+        tiles.reserve(map_file.locations())
+        for location, *terrain in map_file.records():
+            tiles.put(location, *terrain)
+        map_file.close()
+
+        for row in await db.load_tile_owners_rows():
+            location = (row["x"], row["y"])
+            index = tiles.index(location)
+            if index is None:
+                # The map editor deleted the tile after it was claimed
+                logger.warning(f"Owned tile {location} isn't on the map, "
+                               f"skipping it")
+                continue
+            tiles.set_owner(index, row["owner"])
+    else:
+        tiles_data = await db.load_tiles_rows()
+        tiles.reserve((row["x"], row["y"]) for row in tiles_data)
+        for row in tiles_data:
+            tiles.put(
+                (row["x"], row["y"]),
+                row["biome"], 
+                row["is_land"], 
+                row["is_water"],
+                row["difficulty"], 
+                row["straits"],
+                *(row[ore] for ore in ore_types),
+                owner=row["owner"]
+            )
+        
+        if not map_only and MAP_SOURCE.exists():
+            compile_map()
+    tiles.build_neighbors()
+    state.tiles = tiles
+
+    structures_data = await db.load_structures_rows()
+    for row in structures_data:
+        structure = Structure(
+            structure_type=structure_types[row["structure_type"]],
             location=(row["x"], row["y"]),
+            region=row["region"],
             owner=row["owner"]
         )
-        state.tiles[tile.location] = tile
-
-        if row["structure"] != "{}":
-            structure_data = json.loads(row["structure"])
-            structure = Structure(
-                structure_type=structure_types[structure_data['structure_type']],
-                location=(structure_data['x'], structure_data['y']),
-                region=structure_data['region'],
-                owner=structure_data['owner']
-            )
-            tile.structure = structure
+        if structure.location not in state.tiles:
+            logger.warning(f"Structure at {structure.location} isn't on the "
+                           f"map, skipping it")
+            continue
+        state.tiles[structure.location].structure = structure
 
     if map_only:
         logger.info("Loaded map data")
@@ -70,6 +113,12 @@ async def load(state: "GameState", map_only: bool = False):
 
     region_data = await db.load_regions_rows()
     for row in region_data:
+        tiles = [tuple(tile) for tile in json.loads(row["tiles"])]
+        missing = [tile for tile in tiles if tile not in state.tiles]
+        if missing:
+            logger.warning(f"Region {row['name']} has tiles that aren't on "
+                           f"the map, dropping them: {missing}")
+            tiles = [tile for tile in tiles if tile in state.tiles]
         raw_industries = json.loads(row["industries"])
         industries = [industry_types[name] for name in raw_industries]
         region = Region(
@@ -78,7 +127,7 @@ async def load(state: "GameState", map_only: bool = False):
             city_tier=row["city_tier"],
             owner=row["owner"],
             is_capital=row["capital"],
-            tiles=[tuple(tile) for tile in json.loads(row["tiles"])],
+            tiles=tiles,
             industries=industries,
             population=row["population"],
             id=row["id"],
@@ -86,8 +135,7 @@ async def load(state: "GameState", map_only: bool = False):
         )
 
         state.nations[region.owner].regions.append(region.id)
-        state.regions[region.id] = region
-        state.region_ids[region.name] = region.id
+        state.add_region(region)
 
     economies_data = await db.load_economies_rows()
     for row in economies_data:
@@ -115,21 +163,39 @@ async def load(state: "GameState", map_only: bool = False):
         )
         
         state.nations[unit.owner].units.append(unit.id)
-        state.units[unit.id] = unit
-        state.unit_ids[unit.name] = unit.id
+        state.add_unit(unit)
 
     trades_data = await db.load_trades_rows()
     for row in trades_data:
         nations: list[int] = json.loads(row["nations"])
         trade = Trade(
-            id=row["id"],
             nations=nations,
-            resource=row["resoruce"]
+            resource=row["resource"]
         )
+        trade.id = row["id"]
 
         state.trades[trade.id] = trade
         for id in nations:
-            state.nations[id].trades.append(trade)
+            state.nations[id].trades.append(trade.id)
+
+    clock_row = await db.load_clock_row()
+    if clock_row is None:
+        # Counts from today, so a new clock doesn't tick straight away
+        state.clock = GameClock(last_tick=datetime.now(timezone.utc).date())
+        await state.clock.save()
+    else:
+        state.clock = GameClock(
+            tick=clock_row["tick"],
+            season=clock_row["season"],
+            phase=clock_row["phase"],
+            last_tick=(date.fromisoformat(clock_row["last_tick"]) 
+                       if clock_row["last_tick"] is not None else None)
+        )
+        if state.clock.phase:
+            logger.warning(f"Tick {state.clock.tick + 1} was interrupted "
+                           f"during the {state.clock.phase} phase and will "
+                           f"be run again")
+    set_season(state.clock.season)
 
     await build_markets(state)
 
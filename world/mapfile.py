@@ -0,0 +1,165 @@
+import bisect
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Iterator
+
+from game.data.constants import ore_types
+from game.objs.terrain import LAND, WATER, Terrain
+
+logger = logging.getLogger(__name__)
+
+MAP_SOURCE = Path("data/map.db")
+MAP_FILE = Path("data/map.bin")
+
+MAGIC = b"NMAP"
+VERSION = 2
+"""
+Bump whenever the record layout changes. Files with another version are
+ignored and rebuilt.
+"""
+
+# magic, version, record count
+_HEADER = struct.Struct("<4sHxxI")
+# q, r, biome (-1 for none), land/water flags, difficulty, straits, ores
+_RECORD = struct.Struct(f"<hhbBBB{len(ore_types)}d")
+_KEY = struct.Struct("<hh")
+
+def compile_map(source: Path = MAP_SOURCE, destination: Path = MAP_FILE):
+    """
+    Compiles the terrain in a map database into a binary map file. Records
+    are fixed-width and sorted by location so that single tiles can be found
+    by binary search without reading the rest of the file. Ownership and
+    structures are not included, the game database stays authoritative for
+    those.
+
+    :param source: The map database to read terrain from.
+    :param destination: Where to write the compiled map.
+    :type source: Path
+    :type destination: Path
+    """
+    connection = sqlite3.connect(source)
+    try:
+        columns = [row[1] for row in 
+                   connection.execute("PRAGMA table_info(tiles)")]
+        if "terrain" in columns:
+            # Map databases aren't migrated by init_db, so one in the old
+            # layout still has its terrain as JSON
+            logger.warning(f"{source} has the old tiles layout, decoding its "
+                           f"terrain while compiling")
+            rows = [
+                (x, y, *Terrain(*json.loads(terrain)).encode())
+                for x, y, terrain in connection.execute(
+                    "SELECT x, y, terrain FROM tiles ORDER BY x, y"
+                )
+            ]
+        else:
+            rows = connection.execute(
+                f"""
+                SELECT x, y, biome, is_land, is_water, difficulty, straits,
+                    {", ".join(ore_types)}
+                FROM tiles ORDER BY x, y
+                """
+            ).fetchall()
+    finally:
+        connection.close()
+
+    temp_path = Path(destination).with_suffix(".tmp")
+    with open(temp_path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, len(rows)))
+        for q, r, biome, is_land, is_water, difficulty, straits, *ores in rows:
+            flags = (LAND if is_land else 0) | (WATER if is_water else 0)
+            file.write(_RECORD.pack(
+                q, r, -1 if biome is None else biome, flags, difficulty,
+                straits, *ores
+            ))
+    os.replace(temp_path, destination)
+    logger.info(f"Compiled {len(rows)} tiles from {source} into {destination}")
+
+def map_is_current(source: Path = MAP_SOURCE,
+                   destination: Path = MAP_FILE) -> bool:
+    """
+    Returns True if the compiled map exists and is newer than its source,
+    including any edits still in the source's write-ahead log.
+    """
+    if not Path(destination).exists():
+        return False
+    if not Path(source).exists():
+        return True
+    compiled = os.path.getmtime(destination)
+    log = Path(f"{source}-wal")
+    if log.exists() and os.path.getmtime(log) > compiled:
+        return False
+    return compiled >= os.path.getmtime(source)
+
+class MapFile:
+    """
+    A read-only, memory-mapped compiled map. Records are decoded straight
+    from the mapped file as they are read.
+    """
+    def __init__(self, path: Path = MAP_FILE):
+        self._file = open(path, "rb")
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} map file")
+
+    def close(self):
+        self._buffer.close()
+        self._file.close()
+
+    def _offset(self, index: int) -> int:
+        return _HEADER.size + index * _RECORD.size
+
+    def location_at(self, index: int) -> tuple[int, int]:
+        return _KEY.unpack_from(self._buffer, self._offset(index))
+
+    def find(self, location: tuple[int, int]) -> int | None:
+        """
+        Returns the record index of the tile at the given location, or None if
+        the map has no tile there.
+        """
+        index = bisect.bisect_left(range(self.count), tuple(location),
+                                   key=self.location_at)
+        if index < self.count and self.location_at(index) == tuple(location):
+            return index
+        return None
+
+    def records(self) -> Iterator[tuple]:
+        """
+        Iterates over every tile in the file as its location followed by the
+        encoded terrain values of :meth:`Terrain.encode`.
+        """
+        view = memoryview(self._buffer)[_HEADER.size:]
+        try:
+            for q, r, biome, flags, difficulty, straits, *ores in (
+                    _RECORD.iter_unpack(view)):
+                yield ((q, r), None if biome < 0 else biome, flags & LAND, 
+                       flags & WATER, difficulty, straits, *ores)
+        finally:
+            view.release()
+
+    def locations(self) -> Iterator[tuple[int, int]]:
+        for index in range(self.count):
+            yield self.location_at(index)
+
+def open_map() -> MapFile | None:
+    """
+    Opens the compiled map if it exists and is up to date with the map
+    database, otherwise returns None.
+    """
+    if not map_is_current():
+        return None
+    try:
+        return MapFile()
+    except ValueError as e:
+        logger.warning(f"Ignoring compiled map: {e}")
+        return None
+
+if __name__ == "__main__":
+    compile_map()
@@ -2,6 +2,9 @@ from typing import TYPE_CHECKING
 import logging
 from dataclasses import dataclass, field
 
+from world.grid import TileGrid
+from game.objs.clock import GameClock
+
 logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
@@ -9,8 +12,9 @@ if TYPE_CHECKING:
     from game.objs.unit import Unit
     from game.objs.market import Market
     from game.objs.region import Region
-    from game.objs.tile import Tile
     from game.objs.trade import Trade
+    from game.logic.logistics import EconomySnapshot
+    from scripts.rendering import PoliticalLayer
 
 @dataclass
 class GameState:
@@ -18,10 +22,11 @@ class GameState:
     A collection of all of the global level repositories. Records the entirety
     of the game state at any given time.
     """
-    tiles: dict[tuple[int, int], "Tile"] = field(default_factory=dict)
+    tiles: TileGrid = field(default_factory=TileGrid)
     """
     Provides searchable access to tiles. Keys are location tuples, of form 
-    (q, r), indicating the location of the tile on the map.
+    (q, r), indicating the location of the tile on the map. See 
+    :class:`TileGrid` for how the tiles are stored.
     """
     nations: dict[int, "Nation"] = field(default_factory=dict)
     """
@@ -40,6 +45,12 @@ class GameState:
     """
     Maps region names to IDs.
     """
+    port_regions: dict[int, set[int]] = field(default_factory=dict)
+    """
+    Maps NIDs to the IDs of their regions with a port (a coastal core city).
+    Only kept correct if regions are added through :meth:`add_region` and
+    change owner through :meth:`transfer_region`.
+    """
     markets: dict[int, "Market"] = field(default_factory=dict)
     """
     Provides searchable access to markets. Keys are uniquely generated IDs.
@@ -52,10 +63,140 @@ class GameState:
     """
     Maps unit names to IDs.
     """
+    unit_locations: dict[tuple[int, int], set[int]] = field(default_factory=dict)
+    """
+    Maps tile locations to the IDs of the units on them. Only kept correct if
+    units are added, moved and removed through :meth:`add_unit`, 
+    :meth:`relocate_unit` and :meth:`remove_unit`.
+    """
     trades: dict[int, "Trade"] = field(default_factory=dict)
     """
     Provides searchable access to all trades. Keys are uniquely generated IDs.
     """
+    clock: GameClock = field(default_factory=GameClock)
+    """
+    The game's tick counter and season.
+    """
+    region_owner_version: int = 0
+    """
+    Counts changes to which nation owns each region, so that anything drawn
+    from region owners knows when to redraw. See :meth:`transfer_region`.
+    """
+    version: int = 0
+    """
+    Counts changes to the state that affect the economy. Anything that changes
+    populations, industries, markets or trades should call 
+    :meth:`bump_version` so that cached results are recalculated.
+    """
+    economy: "EconomySnapshot | None" = field(default=None, repr=False)
+    """
+    The cached economy for the current version, see 
+    :func:`game.logic.logistics.get_economy`.
+    """
+    political: "PoliticalLayer | None" = field(default=None, repr=False)
+    """
+    The cached political map overlay, see 
+    :func:`scripts.rendering.get_layer`.
+    """
+
+    def bump_version(self):
+        """
+        Marks the state as changed, invalidating cached economy results.
+        """
+        self.version += 1
+
+    def add_region(self, region: "Region"):
+        """
+        Registers a region that has been saved (and so has an ID).
+        """
+        self.regions[region.id] = region
+        self.region_ids[region.name] = region.id
+        index = self.tiles.index(region.location)
+        if index is not None and self.tiles.is_coastal(index):
+            self.port_regions.setdefault(region.owner, set()).add(region.id)
+
+    def transfer_region(self, region: "Region", owner: int):
+        """
+        Gives a region to another nation, keeping both nations' region lists
+        and :attr:`port_regions` correct. Regions should only change owner 
+        through this. The markets of both nations need rebuilding afterwards,
+        see :func:`game.logic.logistics.rebuild_markets`.
+        """
+        old_nation = self.nations.get(region.owner)
+        if old_nation is not None and region.id in old_nation.regions:
+            old_nation.regions.remove(region.id)
+        ports = self.port_regions.get(region.owner)
+        if ports is not None and region.id in ports:
+            ports.discard(region.id)
+            if not ports:
+                del self.port_regions[region.owner]
+            self.port_regions.setdefault(owner, set()).add(region.id)
+
+        region.owner = owner
+        self.nations[owner].regions.append(region.id)
+        self.region_owner_version += 1
+        self.bump_version()
+
+    def adjacent_regions(self, region_id: int) -> set[int]:
+        """
+        Returns the IDs of the regions that border a region. Backed by the 
+        border counts of :attr:`tiles`, which stay up to date as tiles change
+        owner.
+        """
+        return self.tiles.bordering(region_id)
+
+    def bordering_nations(self, nation_id: int) -> set[int]:
+        """
+        Returns the NIDs of the nations with a region bordering one of this
+        nation's regions.
+        """
+        nation_ids = set()
+        for region_id in self.nations[nation_id].regions:
+            for other_id in self.tiles.bordering(region_id):
+                owner = self.regions[other_id].owner
+                if owner != nation_id:
+                    nation_ids.add(owner)
+        return nation_ids
+
+    def add_unit(self, unit: "Unit"):
+        """
+        Registers a unit that has been saved (and so has an ID).
+        """
+        self.units[unit.id] = unit
+        self.unit_ids[unit.name] = unit.id
+        self.unit_locations.setdefault(unit.location, set()).add(unit.id)
+
+    def remove_unit(self, unit: "Unit"):
+        """
+        Unregisters a unit.
+        """
+        self.units.pop(unit.id, None)
+        self.unit_ids.pop(unit.name, None)
+        self._unplace_unit(unit)
+
+    def relocate_unit(self, unit: "Unit", location: tuple[int, int]):
+        """
+        Moves a unit to a new location. Does not check whether it can move
+        there.
+        """
+        self._unplace_unit(unit)
+        unit.location = location
+        self.unit_locations.setdefault(location, set()).add(unit.id)
+
+    def _unplace_unit(self, unit: "Unit"):
+        here = self.unit_locations.get(unit.location)
+        if here is None:
+            return
+        here.discard(unit.id)
+        if not here:
+            del self.unit_locations[unit.location]
+
+    def units_at(self, location: tuple[int, int]) -> list["Unit"]:
+        """
+        Returns the units on the tile at a location.
+        """
+        return [self.units[unit_id] 
+                for unit_id in self.unit_locations.get(location, ())]
 
 global state
 state = GameState()